@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Registration API load benchmark
+
+Drives /api/register/, /api/registrations/ and /api/stats/ at a fixed
+concurrency and reports throughput and p50/p95/p99 latency per endpoint.
+
+Two targets are supported:
+
+  * in-process (default): the Django views run in this process through the
+    test client, with MongoDB replaced by mongomock. This isolates the cost
+    of views.py/mongodb.py from the network and the cluster.
+
+        pip install -r benchmarks/requirements.txt
+        python benchmarks/load_bench.py --check
+
+  * HTTP: point --url at a running server (e.g. gunicorn against a local
+    mongod started with `docker run -d -p 27017:27017 mongo:7`). Start it
+    with READ_CACHE_TTL_REGISTRATIONS=0, READ_CACHE_TTL_STATS=0 and
+    STATS_CACHE_TTL=0 so list and stats requests reach MongoDB.
+
+        python benchmarks/load_bench.py --url http://127.0.0.1:8000/register
+
+--check compares the run with benchmarks/baselines.json and exits non-zero
+when an endpoint's throughput drops, or its median latency grows, by more
+than --tolerance. Tail percentiles are reported but not checked: they are
+too noisy on shared machines. --save-baseline rewrites the baseline for the
+current target from this run; baselines are only comparable on the same
+hardware and with the same --requests/--concurrency.
+"""
+
+import argparse
+import json
+import os
+import string
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(ROOT, 'benchmarks', 'baselines.json')
+sys.path.insert(0, ROOT)
+
+ENDPOINTS = ('register', 'list', 'stats')
+# The list scenario cycles through these so it is not one repeated query
+LIST_QUERIES = ('?limit=50', '?limit=50&branch=COE', '?limit=50&branch=ECE', '?limit=50&branch=MECH', '?limit=50&branch=IT')
+
+
+def submission(n):
+    """A valid, unique registration for sequence number n"""
+    letters = ''.join(string.ascii_lowercase[int(digit)] for digit in str(n))
+    return {
+        'name': f'student {letters}',
+        'admission_no': f'{n:06d}',
+        'email': f'student{n}@gmail.com',
+        'phone': '9876543210',
+        'branch': ('COE', 'ECE', 'MECH', 'IT')[n % 4],
+        'year': str(n % 4 + 1),
+    }
+
+
+class InProcessTarget:
+    """Calls the Django views directly with mongomock standing in for Atlas"""
+
+    def __init__(self):
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'reg_portal.settings')
+        os.environ.setdefault('SECRET_KEY', 'benchmark-only')
+        os.environ.setdefault('MONGODB_CONNECTION_STRING', 'mongodb://benchmark')
+        # Every request comes from one client IP, so lift the per-IP throttle
+        os.environ.setdefault('REGISTER_RATE_PER_IP', '1000000/s')
+        # Otherwise the list and stats scenarios measure cache hits, not queries
+        os.environ.setdefault('READ_CACHE_TTL_REGISTRATIONS', '0')
+        os.environ.setdefault('READ_CACHE_TTL_STATS', '0')
+        os.environ.setdefault('STATS_CACHE_TTL', '0')
+
+        import django
+        django.setup()
+
+        import mongomock
+        from django.test import Client
+        from registration import mongodb
+
+        mongodb.MongoClient = mongomock.MongoClient
+        mongodb.ensure_indexes(mongodb.get_mongodb().collection)
+        self._local = threading.local()
+        self._client_class = Client
+
+    def _client(self):
+        if not hasattr(self._local, 'client'):
+            self._local.client = self._client_class()
+        return self._local.client
+
+    def post(self, path, payload):
+        return self._client().post(path, payload, content_type='application/json').status_code
+
+    def get(self, path):
+        return self._client().get(path).status_code
+
+
+class HttpTarget:
+    """Sends real HTTP requests to a running server"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def _send(self, request):
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+    def post(self, path, payload):
+        request = urllib.request.Request(
+            self.base_url + path.removeprefix('/register'),
+            data=json.dumps(payload).encode(),
+            headers={'Content-Type': 'application/json'},
+            method='POST'
+        )
+        return self._send(request)
+
+    def get(self, path):
+        return self._send(urllib.request.Request(self.base_url + path.removeprefix('/register')))
+
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run_endpoint(target, endpoint, requests, concurrency, offset):
+    """Fire `requests` calls at one endpoint and summarise the latencies"""
+    def call(n):
+        started = time.perf_counter()
+        if endpoint == 'register':
+            status = target.post('/register/api/register/', submission(offset + n))
+        elif endpoint == 'list':
+            status = target.get('/register/api/registrations/' + LIST_QUERIES[n % len(LIST_QUERIES)])
+        else:
+            status = target.get('/register/api/stats/')
+        return time.perf_counter() - started, status
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(call, range(requests)))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for latency, _ in results)
+    errors = sum(1 for _, status in results if status >= 400)
+    return {
+        'requests': requests,
+        'errors': errors,
+        'throughput_rps': round(requests / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Return a list of regressions relative to the baseline"""
+    regressions = []
+    for endpoint, result in results.items():
+        expected = baseline.get(endpoint)
+        if not expected:
+            continue
+        if result['throughput_rps'] < expected['throughput_rps'] * (1 - tolerance):
+            regressions.append(f"{endpoint}: throughput {result['throughput_rps']} rps "
+                               f"< baseline {expected['throughput_rps']} rps")
+        if result['p50_ms'] > expected['p50_ms'] * (1 + tolerance):
+            regressions.append(f"{endpoint}: p50 {result['p50_ms']} ms > baseline {expected['p50_ms']} ms")
+        if result['errors']:
+            regressions.append(f"{endpoint}: {result['errors']} failed requests")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help="Base URL of a running server; in-process with mongomock if omitted")
+    parser.add_argument('--requests', type=int, default=500, help="Requests per endpoint")
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--endpoints', nargs='+', choices=ENDPOINTS, default=list(ENDPOINTS))
+    parser.add_argument('--check', action='store_true', help="Fail if results regress against the baseline")
+    parser.add_argument('--tolerance', type=float, default=0.5, help="Allowed regression, as a fraction")
+    parser.add_argument('--save-baseline', action='store_true', help="Write these results as the new baseline")
+    args = parser.parse_args()
+
+    target = HttpTarget(args.url) if args.url else InProcessTarget()
+    mode = 'http' if args.url else 'in-process'
+    offset = int(time.time()) % 100000 * 10 if args.url else 0
+
+    results = {}
+    for endpoint in args.endpoints:
+        results[endpoint] = run_endpoint(target, endpoint, args.requests, args.concurrency, offset)
+        result = results[endpoint]
+        print(f"{endpoint:>9}: {result['throughput_rps']:8.1f} rps  p50 {result['p50_ms']:7.2f} ms  "
+              f"p95 {result['p95_ms']:7.2f} ms  p99 {result['p99_ms']:7.2f} ms  errors {result['errors']}")
+
+    baselines = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as baseline_file:
+            baselines = json.load(baseline_file)
+
+    if args.save_baseline:
+        baselines[mode] = {'requests': args.requests, 'concurrency': args.concurrency, 'endpoints': results}
+        with open(BASELINE_PATH, 'w') as baseline_file:
+            json.dump(baselines, baseline_file, indent=2, sort_keys=True)
+            baseline_file.write('\n')
+        print(f"Baseline for {mode} saved to {BASELINE_PATH}")
+
+    if args.check:
+        baseline = baselines.get(mode, {})
+        if (baseline.get('requests'), baseline.get('concurrency')) != (args.requests, args.concurrency):
+            print(f"Baseline was recorded with --requests {baseline.get('requests')} "
+                  f"--concurrency {baseline.get('concurrency')}; results may not be comparable")
+        regressions = compare(results, baseline.get('endpoints', {}), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Validation micro-benchmark
+
+Compares registration.validators.validate_registration with a DRF serializer
+carrying the same field rules as RegistrationSerializer. The serializer's
+uniqueness queries are left out (they need the retired djongo model), so the
+DRF numbers here are a lower bound for the old path.
+
+    python benchmarks/validation_bench.py [iterations]
+"""
+
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'reg_portal.settings')
+os.environ.setdefault('SECRET_KEY', 'benchmark-only')
+
+import django
+
+django.setup()
+
+from rest_framework import serializers
+
+from registration.validators import COMMON_BRANCHES, validate_registration
+
+SUBMISSION = {
+    'name': 'ishan sharma',
+    'admission_no': '102203',
+    'email': 'Student@Thapar.edu',
+    'phone': '9876543210',
+    'branch': 'computer engineering',
+    'year': '2',
+}
+
+
+class SerializerPath(serializers.Serializer):
+    """RegistrationSerializer's validate_* rules, minus the DB lookups"""
+    name = serializers.CharField()
+    admission_no = serializers.CharField()
+    email = serializers.CharField()
+    phone = serializers.CharField()
+    branch = serializers.CharField()
+    year = serializers.IntegerField()
+
+    def validate_name(self, value):
+        if not re.match(r'^[a-zA-Z\s]+$', value.strip()):
+            raise serializers.ValidationError("Name can only contain letters and spaces.")
+        if len(value.strip()) < 2:
+            raise serializers.ValidationError("Name must be at least 2 characters long.")
+        return value.strip().title()
+
+    def validate_branch(self, value):
+        common_branches = dict(COMMON_BRANCHES)
+        branch_upper = value.strip().upper()
+        return common_branches.get(branch_upper, branch_upper)
+
+    def validate_admission_no(self, value):
+        if not re.match(r'^\d{6}$', value):
+            raise serializers.ValidationError("Admission number must be exactly 6 digits.")
+        return value
+
+    def validate_phone(self, value):
+        if not re.match(r'^\d{10}$', value):
+            raise serializers.ValidationError("Phone number must be exactly 10 digits.")
+        return value
+
+    def validate_email(self, value):
+        allowed_domains = ['gmail.com', 'thapar.edu']
+        email_lower = value.lower().strip()
+        if email_lower.split('@')[1] not in allowed_domains:
+            raise serializers.ValidationError("Email domain not allowed.")
+        return email_lower
+
+
+def run_serializer():
+    serializer = SerializerPath(data=SUBMISSION)
+    serializer.is_valid(raise_exception=True)
+    return serializer.validated_data
+
+
+def run_validator():
+    return validate_registration(SUBMISSION)
+
+
+if __name__ == '__main__':
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+    results = {}
+    for label, func in (('drf serializer', run_serializer), ('validate_registration', run_validator)):
+        best = min(timeit.repeat(func, number=iterations, repeat=5))
+        results[label] = best / iterations * 1e6
+        print(f"{label:>22}: {results[label]:8.2f} us/call")
+
+    print(f"{'speedup':>22}: {results['drf serializer'] / results['validate_registration']:8.1f}x")
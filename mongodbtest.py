@@ -108,7 +108,8 @@ def test_mongodb_connection():
     try:
         # Import your mongodb connection
         sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-        from registration.mongodb import mongodb
+        from registration.mongodb import get_mongodb
+        mongodb = get_mongodb()
         
         print("✅ Successfully imported your mongodb connection")
         
@@ -5,6 +5,12 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+Serving through this module switches the registration API to the async
+views backed by PyMongo's AsyncMongoClient and enables the Server-Sent
+Events feed at /register/api/feed/, e.g.:
+
+    gunicorn -k uvicorn.workers.UvicornWorker reg_portal.asgi:application
 """
 
 import os
@@ -12,5 +18,11 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'reg_portal.settings')
+os.environ.setdefault('REGISTRATION_ASYNC_VIEWS', 'true')
 
 application = get_asgi_application()
+
+# Deliver anything left in the registration spool by a previous run
+from registration.mongodb import start_spool_drain
+
+start_spool_drain()
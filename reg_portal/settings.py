@@ -44,8 +44,77 @@ CORS_ALLOW_ALL_ORIGINS = True  # For development only
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
-    ]
+    ],
+    # Renders MongoDB documents (ObjectId, datetime) directly with orjson
+    'DEFAULT_RENDERER_CLASSES': [
+        'registration.renderers.MongoJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    # Token buckets for /api/register/ (see registration/throttling.py),
+    # kept in the default cache: per worker with locmem, global with a shared backend.
+    # The per-admission-number bucket is the main limit. The per-IP one is off
+    # unless REGISTER_RATE_PER_IP is set: behind a campus NAT every student
+    # shares an address, and a low rate would turn the registration window away
+    'DEFAULT_THROTTLE_RATES': {
+        'register_ip': os.getenv('REGISTER_RATE_PER_IP') or None,
+        'register_admission_no': os.getenv('REGISTER_RATE_PER_ADMISSION_NO', '5/min'),
+    },
+    # Proxies in front of the app. 0 keys the per-IP throttle on REMOTE_ADDR
+    # and ignores X-Forwarded-For, which clients can set to anything; behind
+    # a proxy set NUM_PROXIES to the number of hops that append to it (the
+    # Dockerfile sets 1 for the platform's router)
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', '0')),
+}
+
+# Serve the registration API through the async views.
+# reg_portal/asgi.py turns this on; the WSGI entry point keeps the sync views.
+REGISTRATION_ASYNC_VIEWS = os.getenv('REGISTRATION_ASYNC_VIEWS', 'false').lower() == 'true'
+
+# Registrations one worker runs at once; more are shed with a 503 (see
+# registration/throttling.py). An ASGI worker runs them all on one event loop,
+# so it defaults to 4 x MONGODB_MAX_POOL_SIZE (PyMongo's default pool is 100):
+# each holds a pooled connection only for its insert. A sync worker runs one
+# request per thread and gunicorn queues the rest before they reach the view,
+# so no cap applies under WSGI unless REGISTER_MAX_IN_FLIGHT is set.
+# If the pool's wait queue times out under load, lower the cap or raise
+# MONGODB_MAX_POOL_SIZE.
+if os.getenv('REGISTER_MAX_IN_FLIGHT'):
+    REGISTER_MAX_IN_FLIGHT = int(os.environ['REGISTER_MAX_IN_FLIGHT'])
+elif REGISTRATION_ASYNC_VIEWS:
+    REGISTER_MAX_IN_FLIGHT = 4 * int(os.getenv('MONGODB_MAX_POOL_SIZE', '100'))
+else:
+    REGISTER_MAX_IN_FLIGHT = None
+
+# max-age (seconds) sent on the list and stats endpoints so a CDN or reverse
+# proxy can absorb repeat reads; after that they revalidate with the ETag
+API_CACHE_MAX_AGE = int(os.getenv('API_CACHE_MAX_AGE', '5'))
+
+# Cache used for Idempotency-Key replays, throttling buckets and the
+# MongoDB read cache (registration/read_cache.py). CACHE_BACKEND picks it:
+#   locmem - per worker, no services needed (default)
+#   file   - shared by the workers on one host; CACHE_LOCATION is a directory
+#   redis  - shared by every host; CACHE_LOCATION is a redis:// URL and the
+#            `redis` package must be installed
+CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'reg_portal'),
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', str(BASE_DIR / 'cache')),
+    'redis': ('django.core.cache.backends.redis.RedisCache', 'redis://localhost:6379/0'),
+}
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'locmem')
+if CACHE_BACKEND not in CACHE_BACKENDS:
+    raise ValueError(f"CACHE_BACKEND must be one of: {', '.join(CACHE_BACKENDS)}")
+cache_class, default_location = CACHE_BACKENDS[CACHE_BACKEND]
+
+CACHES = {
+    'default': {
+        'BACKEND': cache_class,
+        'LOCATION': os.getenv('CACHE_LOCATION', default_location),
+        'KEY_PREFIX': 'reg_portal',
+    }
 }
+if CACHE_BACKEND != 'redis':
+    # Redis evicts by its own maxmemory policy instead
+    CACHES['default']['OPTIONS'] = {'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', '10000'))}
 
 # Application definition
 INSTALLED_APPS = [
@@ -61,6 +130,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'registration.middleware.RequestTimingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.middleware.security.SecurityMiddleware',
@@ -91,6 +161,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'reg_portal.wsgi.application'
+ASGI_APPLICATION = 'reg_portal.asgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
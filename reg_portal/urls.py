@@ -14,10 +14,17 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
+from registration import views as registration_views
+
+# Under ASGI the requests are served by the async client, so report its pool
+if settings.REGISTRATION_ASYNC_VIEWS:
+    from registration import async_views as registration_views
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('register/', include('registration.urls'))
+    path('register/', include('registration.urls')),
+    path('metrics', registration_views.metrics, name='metrics'),
 ]
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'reg_portal.settings')
 
 application = get_wsgi_application()
+
+# Deliver anything left in the registration spool by a previous run
+from registration.mongodb import start_spool_drain
+
+start_spool_drain()
@@ -0,0 +1,271 @@
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from .export import ASYNC_EXPORT_FORMATS, aprefetch
+from .idempotency import (
+    IDEMPOTENCY_HEADER,
+    IdempotencyError,
+    aabandon_request,
+    abegin_request,
+    acomplete_request,
+)
+from .live import FEED_HEARTBEAT_SECONDS, get_registration_feed
+from .monitoring import render_metrics
+from .mongodb import STATUS_FIELDS, WRITE_MODE, DuplicateRegistrationError, public_registration
+from .mongodb_async import get_async_mongodb
+from .renderers import MongoJSONResponse
+from .throttling import athrottle_registration, register_concurrency, throttled_response
+from .validators import RegistrationValidationError, validate_registration
+from .views import (
+    build_page,
+    build_search_page,
+    content_etag,
+    is_admin,
+    not_modified,
+    parse_list_params,
+    parse_search_params,
+    set_cache_headers,
+    version_validators,
+)
+import asyncio
+import logging
+import json
+
+logger = logging.getLogger(__name__)
+
+
+def parse_request_data(request):
+    """Read a JSON or form-encoded request body into a dict"""
+    if request.content_type == 'application/json':
+        return json.loads(request.body or b'{}')
+    return request.POST
+
+
+async def _create_registration(data):
+    """Insert validated registration data; returns (payload, status)"""
+    try:
+        registration = await get_async_mongodb().create_registration(data)
+        if WRITE_MODE == 'spooled':
+            return {'message': 'Registration received!', 'registration_id': registration['registration_id']}, 202
+        return {'message': 'Registration successful!', 'data': public_registration(registration)}, 201
+
+    except DuplicateRegistrationError as e:
+        return {'error': str(e), 'field': e.field}, 400
+    except ValueError as e:
+        return {'error': str(e)}, 400
+    except Exception as e:
+        logger.error(f"Registration error: {e}")
+        return {'error': 'Internal server error'}, 500
+
+
+@register_concurrency
+@csrf_exempt
+@require_POST
+async def create_registration(request):
+    """Async API endpoint to create a new registration, honouring Idempotency-Key"""
+    try:
+        submitted = parse_request_data(request)
+    except ValueError:
+        return MongoJSONResponse({'error': 'Invalid JSON body'}, status=400)
+
+    wait = await athrottle_registration(request, submitted)
+    if wait:
+        return throttled_response(wait)
+
+    try:
+        data = validate_registration(submitted)
+    except RegistrationValidationError as e:
+        return MongoJSONResponse({'error': str(e), 'errors': e.errors}, status=400)
+
+    key = request.headers.get(IDEMPOTENCY_HEADER)
+    if not key:
+        payload, status = await _create_registration(data)
+        return MongoJSONResponse(payload, status=status)
+
+    try:
+        replay = await abegin_request(key, data)
+    except IdempotencyError as e:
+        return MongoJSONResponse({'error': str(e)}, status=e.status)
+    if replay:
+        status, payload = replay
+        response = MongoJSONResponse(payload, status=status)
+        response['Idempotent-Replayed'] = 'true'
+        return response
+
+    payload, status = await _create_registration(data)
+    if status < 300:
+        await acomplete_request(key, data, status, payload)
+    else:
+        await aabandon_request(key)
+    return MongoJSONResponse(payload, status=status)
+
+
+@require_GET
+async def list_registrations(request):
+    """Async API endpoint to list registrations, one keyset-paginated page at a time"""
+    try:
+        branch, limit, after, fields = parse_list_params(request.GET)
+    except ValueError as e:
+        return MongoJSONResponse({'error': str(e)}, status=400)
+
+    try:
+        mongodb = get_async_mongodb()
+        etag, last_modified = version_validators(await mongodb.get_collection_version())
+        response = not_modified(request, etag, last_modified)
+        if response is not None:
+            return response
+
+        registrations = await mongodb.get_registrations(
+            branch=branch, limit=limit, after=after, fields=fields
+        )
+        response = MongoJSONResponse(build_page(registrations, limit, fields))
+        return set_cache_headers(response, etag, last_modified)
+
+    except Exception as e:
+        logger.error(f"Error fetching registrations: {e}")
+        return MongoJSONResponse({'error': 'Internal server error'}, status=500)
+
+
+@require_GET
+async def search_registrations(request):
+    """Async admin API endpoint for prefix search on admission number, email or name"""
+    if not await sync_to_async(is_admin)(request):
+        return MongoJSONResponse({'error': 'Admin access required'}, status=403)
+
+    try:
+        field, term, limit, after = parse_search_params(request.GET)
+    except ValueError as e:
+        return MongoJSONResponse({'error': str(e)}, status=400)
+
+    try:
+        registrations = await get_async_mongodb().search_registrations(field, term, limit=limit, after=after)
+        return MongoJSONResponse(build_search_page(registrations, limit, field))
+
+    except Exception as e:
+        logger.error(f"Error searching registrations: {e}")
+        return MongoJSONResponse({'error': 'Internal server error'}, status=500)
+
+
+@require_GET
+async def get_registration(request, registration_id):
+    """Async API endpoint for a student to check one registration by its registration_id"""
+    try:
+        registration = await get_async_mongodb().get_registration_by_id(str(registration_id), fields=STATUS_FIELDS)
+    except Exception as e:
+        logger.error(f"Error fetching registration: {e}")
+        return MongoJSONResponse({'error': 'Internal server error'}, status=500)
+
+    if registration is None:
+        return MongoJSONResponse({'error': 'Registration not found'}, status=404)
+
+    etag = content_etag(registration)
+    response = not_modified(request, etag)
+    if response is None:
+        response = MongoJSONResponse(registration)
+    return set_cache_headers(response, etag)
+
+
+@require_GET
+async def export_registrations(request):
+    """Async version of views.export_registrations, streamed straight from the async cursor"""
+    # Session and Basic authentication both query the database
+    if not await sync_to_async(is_admin)(request):
+        return MongoJSONResponse({'error': 'Admin access required'}, status=403)
+
+    export_format = request.GET.get('format', 'ndjson')
+    if export_format not in ASYNC_EXPORT_FORMATS:
+        return MongoJSONResponse({'error': f"format must be one of: {', '.join(ASYNC_EXPORT_FORMATS)}"}, status=400)
+
+    render_rows, content_type = ASYNC_EXPORT_FORMATS[export_format]
+    try:
+        registrations = await aprefetch(get_async_mongodb().iter_registrations(branch=request.GET.get('branch')))
+    except Exception as e:
+        logger.error(f"Error exporting registrations: {e}")
+        return MongoJSONResponse({'error': 'Internal server error'}, status=500)
+
+    response = StreamingHttpResponse(render_rows(registrations), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="registrations.{export_format}"'
+    return response
+
+
+@require_GET
+async def registration_stats(request):
+    """Async API endpoint to get registration statistics"""
+    try:
+        stats = await get_async_mongodb().get_registration_stats()
+        etag = content_etag(stats)
+        response = not_modified(request, etag)
+        if response is None:
+            response = MongoJSONResponse(stats)
+        return set_cache_headers(response, etag)
+
+    except Exception as e:
+        logger.error(f"Error fetching stats: {e}")
+        return MongoJSONResponse({'error': 'Internal server error'}, status=500)
+
+
+@require_GET
+async def pool_stats(request):
+    """Async version of views.pool_stats, reporting the async client's pool"""
+    if not await sync_to_async(is_admin)(request):
+        return MongoJSONResponse({'error': 'Admin access required'}, status=403)
+    try:
+        return MongoJSONResponse(get_async_mongodb().pool_stats.snapshot())
+    except Exception as e:
+        logger.error(f"Error fetching pool stats: {e}")
+        return MongoJSONResponse({'error': 'Internal server error'}, status=500)
+
+
+@require_GET
+async def metrics(request):
+    """Async version of views.metrics, with the async client's pool counters"""
+    try:
+        pool_stats = get_async_mongodb().pool_stats.snapshot()
+    except Exception:
+        pool_stats = None
+    return HttpResponse(render_metrics(pool_stats), content_type='text/plain; version=0.0.4')
+
+
+async def feed_events(feed, queue):
+    """Yield a stats snapshot, then every event the feed queues for this connection"""
+    try:
+        # The feed's latest resync, counted from the collection rather than
+        # the stats caches, which miss other workers' recent inserts. It can
+        # be up to FEED_RESYNC_SECONDS old, and a registration made around
+        # it may be counted twice or not at all; the next resync corrects that.
+        try:
+            snapshot = await feed.stats_snapshot()
+            if snapshot is not None:
+                yield snapshot
+        except Exception as e:
+            logger.error(f"Error fetching stats for feed: {e}")
+
+        while True:
+            try:
+                message = await asyncio.wait_for(queue.get(), FEED_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield b': keepalive\n\n'
+                continue
+            if message is None:
+                return
+            yield message
+    finally:
+        feed.unsubscribe(queue)
+
+
+@require_GET
+async def registration_feed(request):
+    """Server-Sent Events stream of new registrations and running count deltas.
+
+    Every connection in this process shares one change stream; see
+    RegistrationFeed. Clients apply each event's delta to the latest
+    ``stats`` event: the snapshot sent on connect, then the fresh counts the
+    feed pushes every FEED_RESYNC_SECONDS.
+    """
+    feed = get_registration_feed()
+    response = StreamingHttpResponse(feed_events(feed, feed.subscribe()), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,102 @@
+from concurrent.futures import Future
+import asyncio
+import logging
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class InsertBatcher:
+    """Groups concurrent single-document inserts into one insert_many.
+
+    ``insert_many`` takes a list of documents and returns a dict mapping the
+    index of each failed document to its write error. The first submission
+    opens a window of ``max_delay`` seconds; everything queued by then (up
+    to ``max_size`` documents) is flushed together and each caller gets back
+    its own write error, or None on success.
+    """
+
+    def __init__(self, insert_many, max_size=500, max_delay=0.005):
+        self._insert_many = insert_many
+        self.max_size = max_size
+        self.max_delay = max_delay
+        self._queue = queue.Queue()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+    def submit(self, document):
+        """Queue a document and block until its batch has been written"""
+        if self._thread is None:
+            with self._thread_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='insert-batcher', daemon=True)
+                    self._thread.start()
+
+        future = Future()
+        self._queue.put((document, future))
+        return future.result()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            time.sleep(self.max_delay)
+            while len(batch) < self.max_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._flush(batch)
+
+    def _flush(self, batch):
+        try:
+            failures = self._insert_many([document for document, _ in batch])
+        except Exception as e:
+            logger.error(f"Batched insert of {len(batch)} registrations failed: {e}")
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for index, (_, future) in enumerate(batch):
+            future.set_result(failures.get(index))
+
+
+class AsyncInsertBatcher:
+    """asyncio counterpart of InsertBatcher; ``insert_many`` is a coroutine"""
+
+    def __init__(self, insert_many, max_size=500, max_delay=0.005):
+        self._insert_many = insert_many
+        self.max_size = max_size
+        self.max_delay = max_delay
+        self._queue = asyncio.Queue()
+        self._task = None
+
+    async def submit(self, document):
+        """Queue a document and wait until its batch has been written"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((document, future))
+        return await future
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            await asyncio.sleep(self.max_delay)
+            while len(batch) < self.max_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            await self._flush(batch)
+
+    async def _flush(self, batch):
+        try:
+            failures = await self._insert_many([document for document, _ in batch])
+        except Exception as e:
+            logger.error(f"Batched insert of {len(batch)} registrations failed: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for index, (_, future) in enumerate(batch):
+            if not future.done():
+                future.set_result(failures.get(index))
@@ -0,0 +1,106 @@
+import asyncio
+import hashlib
+import logging
+import math
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """Fixed-size probabilistic set of strings.
+
+    Sized for ``capacity`` keys at a false-positive rate of ``error_rate``
+    (about 1.2 bytes per key at 1%). ``in`` can return a false positive but
+    never a false negative for a key that was added.
+    """
+
+    def __init__(self, capacity, error_rate=0.01):
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        # Setting a bit is a read-modify-write of its byte
+        self._lock = threading.Lock()
+
+    def _positions(self, key):
+        # Double hashing: k positions from one 128-bit digest
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        step = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * step) % self.size for i in range(self.hash_count)]
+
+    def add(self, key):
+        positions = self._positions(key)
+        with self._lock:
+            for position in positions:
+                self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key):
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class DuplicateFilter:
+    """Per-process pre-filter for admission numbers and emails already taken.
+
+    A miss means this process has never seen the value, not that it is free
+    (other workers insert too), so the unique indexes stay the source of
+    truth. A hit marks a likely duplicate worth confirming with an indexed
+    lookup before attempting the insert.
+    """
+
+    FIELDS = ('admission_no', 'email')
+
+    def __init__(self, capacity, error_rate=0.01):
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._thread = None
+        self._task = None
+
+    def add(self, registration, fields=FIELDS):
+        """Remember the normalised unique fields of a stored registration"""
+        for field in fields:
+            self._bloom.add(f'{field}:{registration[field]}')
+
+    def maybe_taken(self, registration):
+        """Fields of this registration whose values may already be stored"""
+        return [field for field in self.FIELDS if f'{field}:{registration[field]}' in self._bloom]
+
+    def warm(self, scan):
+        """Load existing values; ``scan(field)`` yields every stored value of a field"""
+        count = 0
+        for field in self.FIELDS:
+            for value in scan(field):
+                self._bloom.add(f'{field}:{value}')
+                count += 1
+        logger.info(f"Duplicate filter warmed with {count} values")
+
+    async def awarm(self, scan):
+        """Async version of warm; ``scan(field)`` is an async iterator"""
+        count = 0
+        for field in self.FIELDS:
+            async for value in scan(field):
+                self._bloom.add(f'{field}:{value}')
+                count += 1
+        logger.info(f"Duplicate filter warmed with {count} values")
+
+    def start(self, scan):
+        """Warm the filter in a background thread"""
+        self._thread = threading.Thread(target=self._warm_safely, args=(scan,),
+                                        name='duplicate-filter-warm', daemon=True)
+        self._thread.start()
+
+    def _warm_safely(self, scan):
+        try:
+            self.warm(scan)
+        except Exception as e:
+            # Without warming, hits only come from this process's own inserts
+            logger.error(f"Duplicate filter warm-up failed: {e}")
+
+    def astart(self, scan):
+        """Warm the filter in a task on the running event loop; ``scan`` as for awarm"""
+        self._task = asyncio.get_running_loop().create_task(self._awarm_safely(scan))
+
+    async def _awarm_safely(self, scan):
+        try:
+            await self.awarm(scan)
+        except Exception as e:
+            logger.error(f"Duplicate filter warm-up failed: {e}")
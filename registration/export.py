@@ -0,0 +1,89 @@
+import csv
+import itertools
+
+from .mongodb import EXPORT_FIELDS
+from .renderers import dumps
+
+
+class Echo:
+    """File-like object that hands back whatever csv.writer writes to it"""
+
+    def write(self, value):
+        return value
+
+
+def _export_value(value):
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+
+def _ndjson_row(registration):
+    return dumps({field: registration.get(field) for field in EXPORT_FIELDS}) + b'\n'
+
+
+def _csv_row(registration):
+    return [_export_value(registration.get(field, '')) for field in EXPORT_FIELDS]
+
+
+def ndjson_rows(registrations):
+    """Render registrations as newline-delimited JSON, one document per line"""
+    for registration in registrations:
+        yield _ndjson_row(registration)
+
+
+def csv_rows(registrations):
+    """Render registrations as CSV with a header row"""
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for registration in registrations:
+        yield writer.writerow(_csv_row(registration))
+
+
+async def andjson_rows(registrations):
+    """Async version of ndjson_rows, for AsyncMongoClient cursors"""
+    async for registration in registrations:
+        yield _ndjson_row(registration)
+
+
+async def acsv_rows(registrations):
+    """Async version of csv_rows, for AsyncMongoClient cursors"""
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    async for registration in registrations:
+        yield writer.writerow(_csv_row(registration))
+
+
+def prefetch(registrations):
+    """Fetch the first registration now and return an iterator over all of them.
+
+    Cursors only query on first iteration; doing that before the response
+    starts lets a failed query still be answered with an error status.
+    """
+    registrations = iter(registrations)
+    first = next(registrations, None)
+    return iter(()) if first is None else itertools.chain((first,), registrations)
+
+
+async def _achain(first, registrations):
+    if first is None:
+        return
+    yield first
+    async for registration in registrations:
+        yield registration
+
+
+async def aprefetch(registrations):
+    """Async version of prefetch, for AsyncMongoClient cursors"""
+    return _achain(await anext(registrations, None), registrations)
+
+
+EXPORT_FORMATS = {
+    'ndjson': (ndjson_rows, 'application/x-ndjson'),
+    'csv': (csv_rows, 'text/csv'),
+}
+
+# Async iterators are streamed as-is under ASGI; sync ones are first
+# collected into a list in a worker thread
+ASYNC_EXPORT_FORMATS = {
+    'ndjson': (andjson_rows, 'application/x-ndjson'),
+    'csv': (acsv_rows, 'text/csv'),
+}
@@ -0,0 +1,84 @@
+from django.core.cache import cache
+import hashlib
+import json
+import os
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+# How long a completed response is replayed for, and how long an in-flight
+# request holds its key before a retry may take it over
+IDEMPOTENCY_KEY_TTL = int(os.getenv('IDEMPOTENCY_KEY_TTL', '86400'))
+IDEMPOTENCY_PENDING_TTL = int(os.getenv('IDEMPOTENCY_PENDING_TTL', '30'))
+
+
+class IdempotencyError(Exception):
+    """Raised when a key cannot be used for this request"""
+
+    def __init__(self, message, status):
+        self.status = status
+        super().__init__(message)
+
+
+def _cache_key(key):
+    if len(key) > MAX_KEY_LENGTH:
+        raise IdempotencyError(f"{IDEMPOTENCY_HEADER} must be at most {MAX_KEY_LENGTH} characters", 400)
+    return 'idempotency:' + hashlib.sha256(key.encode()).hexdigest()
+
+
+def _fingerprint(data):
+    return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _check(entry, fingerprint):
+    if entry['fingerprint'] != fingerprint:
+        raise IdempotencyError(f"{IDEMPOTENCY_HEADER} was already used with a different registration", 422)
+    if entry['state'] == 'pending':
+        raise IdempotencyError(f"A request with this {IDEMPOTENCY_HEADER} is still being processed", 409)
+    return entry['status'], entry['body']
+
+
+def begin_request(key, data):
+    """Claim a key for this request.
+
+    Returns None when the caller should process the request, or the stored
+    (status, body) of the original response when this is a replay.
+    """
+    cache_key = _cache_key(key)
+    fingerprint = _fingerprint(data)
+    if cache.add(cache_key, {'state': 'pending', 'fingerprint': fingerprint}, IDEMPOTENCY_PENDING_TTL):
+        return None
+    entry = cache.get(cache_key)
+    return _check(entry, fingerprint) if entry else None
+
+
+def complete_request(key, data, status, body):
+    """Store the response so retries with the same key replay it"""
+    entry = {'state': 'done', 'fingerprint': _fingerprint(data), 'status': status, 'body': body}
+    cache.set(_cache_key(key), entry, IDEMPOTENCY_KEY_TTL)
+
+
+def abandon_request(key):
+    """Release a key after a failed request so the client can retry"""
+    cache.delete(_cache_key(key))
+
+
+async def abegin_request(key, data):
+    """Async version of begin_request"""
+    cache_key = _cache_key(key)
+    fingerprint = _fingerprint(data)
+    if await cache.aadd(cache_key, {'state': 'pending', 'fingerprint': fingerprint}, IDEMPOTENCY_PENDING_TTL):
+        return None
+    entry = await cache.aget(cache_key)
+    return _check(entry, fingerprint) if entry else None
+
+
+async def acomplete_request(key, data, status, body):
+    """Async version of complete_request"""
+    entry = {'state': 'done', 'fingerprint': _fingerprint(data), 'status': status, 'body': body}
+    await cache.aset(_cache_key(key), entry, IDEMPOTENCY_KEY_TTL)
+
+
+async def aabandon_request(key):
+    """Async version of abandon_request"""
+    await cache.adelete(_cache_key(key))
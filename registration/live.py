@@ -0,0 +1,179 @@
+from pymongo.errors import OperationFailure
+import asyncio
+import logging
+import os
+
+from .mongodb_async import get_async_mongodb
+from .renderers import dumps
+from .stats_cache import UNKNOWN_STATS_GROUP
+
+logger = logging.getLogger(__name__)
+
+# Registration fields pushed to dashboards for each new registration
+FEED_FIELDS = ('registration_id', 'name', 'branch', 'year', 'created_at')
+
+# Events buffered per connection; a dashboard that falls further behind is
+# disconnected (EventSource reconnects and starts from a fresh snapshot)
+FEED_QUEUE_SIZE = int(os.getenv('FEED_QUEUE_SIZE', '100'))
+# Comment lines keep idle connections from being closed by proxies
+FEED_HEARTBEAT_SECONDS = float(os.getenv('FEED_HEARTBEAT_SECONDS', '15'))
+FEED_RETRY_SECONDS = float(os.getenv('FEED_RETRY_SECONDS', '5'))
+# Deltas can drift from the true counts (an insert racing the snapshot, a
+# stream reconnect), so fresh counts are pushed this often; 0 turns it off
+FEED_RESYNC_SECONDS = float(os.getenv('FEED_RESYNC_SECONDS', '60'))
+
+CHANGE_STREAM_HISTORY_LOST = 286
+
+# Only new, active registrations, trimmed server-side to what the feed sends
+FEED_PIPELINE = [
+    {'$match': {'operationType': 'insert', 'fullDocument.is_active': True}},
+    {'$project': {f'fullDocument.{field}': 1 for field in (*FEED_FIELDS, 'email_domain')}},
+]
+
+
+def format_event(event, data):
+    """Encode one Server-Sent Events message"""
+    return b'event: ' + event.encode() + b'\ndata: ' + dumps(data) + b'\n\n'
+
+
+def registration_delta(registration):
+    """Change to the /api/stats/ counts caused by one new registration.
+
+    Missing groups are counted under UNKNOWN_STATS_GROUP, as in build_stats.
+    """
+    branch, email_domain = (
+        UNKNOWN_STATS_GROUP if registration.get(field) is None else registration[field]
+        for field in ('branch', 'email_domain')
+    )
+    return {
+        'total_registrations': 1,
+        'branch_wise': {branch: 1},
+        'email_domains': {email_domain: 1},
+        'year_wise': {f"Year {registration['year']}": 1},
+    }
+
+
+class RegistrationFeed:
+    """Fans one change stream on the registrations collection out to every
+    connected dashboard in this process.
+
+    The stream is opened when the first subscriber arrives and closed when
+    the last one leaves, so N viewers cost one cursor. Each event is encoded
+    once and the same bytes are queued for every subscriber. While anyone is
+    subscribed, ``load_stats`` is also awaited every ``resync_seconds`` and
+    its result sent as a ``stats`` event; new connections are handed the
+    latest of these instead of each running ``load_stats``.
+    """
+
+    def __init__(self, collection, load_stats=None, queue_size=FEED_QUEUE_SIZE,
+                 retry_seconds=FEED_RETRY_SECONDS, resync_seconds=FEED_RESYNC_SECONDS):
+        self._collection = collection
+        self._load_stats = load_stats
+        self.queue_size = queue_size
+        self.retry_seconds = retry_seconds
+        self.resync_seconds = resync_seconds
+        self._subscribers = set()
+        self._task = None
+        self._resume_token = None
+        self._stats_message = None
+        self._stats_lock = asyncio.Lock()
+
+    def subscribe(self):
+        """Register a dashboard; returns the queue its events arrive on"""
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        return queue
+
+    def unsubscribe(self, queue):
+        """Drop a dashboard, closing the change stream if it was the last one"""
+        self._subscribers.discard(queue)
+        if not self._subscribers and self._task is not None:
+            self._task.cancel()
+            self._task = None
+            # Nobody is waiting on missed events, so the next stream starts fresh
+            self._resume_token = None
+            # Nor is anything keeping the stats snapshot up to date
+            self._stats_message = None
+
+    async def stats_snapshot(self):
+        """Encoded ``stats`` event to send a new connection, or None without load_stats.
+
+        Shares the most recent resync's payload, so it is at most
+        ``resync_seconds`` old; only the first connection (or every one,
+        with resync turned off) waits for ``load_stats``.
+        """
+        if self._load_stats is None:
+            return None
+        if self.resync_seconds <= 0:
+            return format_event('stats', await self._load_stats())
+        async with self._stats_lock:
+            if self._stats_message is None:
+                self._stats_message = format_event('stats', await self._load_stats())
+            return self._stats_message
+
+    def publish(self, message):
+        """Queue an encoded event for every subscriber.
+
+        A subscriber whose queue is full is cut off with a None sentinel
+        rather than slowing down everyone else.
+        """
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                self._subscribers.discard(queue)
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+    async def _run(self):
+        if self._load_stats and self.resync_seconds > 0:
+            await asyncio.gather(self._watch(), self._resync())
+        else:
+            await self._watch()
+
+    async def _resync(self):
+        while True:
+            await asyncio.sleep(self.resync_seconds)
+            try:
+                self._stats_message = format_event('stats', await self._load_stats())
+                self.publish(self._stats_message)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Registration feed stats refresh failed: {e}")
+
+    async def _watch(self):
+        while True:
+            try:
+                async with await self._collection.watch(FEED_PIPELINE, resume_after=self._resume_token) as stream:
+                    async for change in stream:
+                        self._resume_token = stream.resume_token
+                        registration = change['fullDocument']
+                        self.publish(format_event('registration', {
+                            'registration': {field: registration.get(field) for field in FEED_FIELDS},
+                            'delta': registration_delta(registration),
+                        }))
+            except asyncio.CancelledError:
+                raise
+            except OperationFailure as e:
+                if e.code == CHANGE_STREAM_HISTORY_LOST:
+                    self._resume_token = None
+                logger.error(f"Registration feed error: {e}")
+            except Exception as e:
+                logger.error(f"Registration feed error: {e}")
+            await asyncio.sleep(self.retry_seconds)
+
+
+_feed = None
+
+
+def get_registration_feed():
+    """Return the process-wide feed, created inside the running event loop"""
+    global _feed
+    if _feed is None:
+        mongodb = get_async_mongodb()
+        _feed = RegistrationFeed(mongodb.read_collection, load_stats=mongodb.compute_registration_stats)
+    return _feed
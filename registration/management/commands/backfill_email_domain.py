@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from registration.mongodb import get_mongodb, ensure_indexes
+
+
+# Same derivation as build_registration_document, done server side
+EMAIL_DOMAIN_UPDATE = [
+    {'$set': {'email_domain': {
+        '$arrayElemAt': [{'$split': ['$email', '@']}, -1]
+    }}}
+]
+
+
+class Command(BaseCommand):
+    help = "Store email_domain on registrations created before the field existed"
+
+    def handle(self, *args, **options):
+        try:
+            mongodb = get_mongodb()
+        except Exception as e:
+            raise CommandError(f"MongoDB connection is not available: {e}")
+
+        result = mongodb.collection.update_many(
+            {'email_domain': {'$exists': False}},
+            EMAIL_DOMAIN_UPDATE
+        )
+        ensure_indexes(mongodb.collection)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Backfilled email_domain on {result.modified_count} registrations"
+        ))
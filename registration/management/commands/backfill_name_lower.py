@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from registration.mongodb import get_mongodb, ensure_indexes
+
+
+# Same derivation as normalise_name, done server side (names are ASCII)
+NAME_LOWER_UPDATE = [
+    {'$set': {'name_lower': {'$toLower': {'$trim': {'input': '$name'}}}}}
+]
+
+
+class Command(BaseCommand):
+    help = "Store name_lower on registrations created before name search existed"
+
+    def handle(self, *args, **options):
+        try:
+            mongodb = get_mongodb()
+        except Exception as e:
+            raise CommandError(f"MongoDB connection is not available: {e}")
+
+        result = mongodb.collection.update_many(
+            {'name_lower': {'$exists': False}},
+            NAME_LOWER_UPDATE
+        )
+        ensure_indexes(mongodb.collection)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Backfilled name_lower on {result.modified_count} registrations"
+        ))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from registration.mongodb import SPOOL_DIR, get_mongodb
+from registration.spool import RegistrationSpool
+
+
+class Command(BaseCommand):
+    help = "Deliver registrations waiting in the local spool to MongoDB"
+
+    def handle(self, *args, **options):
+        spool = RegistrationSpool(SPOOL_DIR, lambda documents: get_mongodb().upsert_documents(documents))
+        try:
+            delivered = spool.drain()
+        except Exception as e:
+            raise CommandError(f"Could not drain the spool: {e}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Processed {delivered} spooled registrations, {spool.pending_bytes()} bytes still pending"
+        ))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from registration.mongodb import get_mongodb, ensure_indexes
+
+
+class Command(BaseCommand):
+    help = "Check the MongoDB connection and create the registration indexes"
+
+    def handle(self, *args, **options):
+        try:
+            mongodb = get_mongodb()
+            mongodb.ping()
+            ensure_indexes(mongodb.collection)
+        except Exception as e:
+            raise CommandError(f"Could not prepare MongoDB: {e}")
+
+        self.stdout.write(self.style.SUCCESS("MongoDB indexes are in place"))
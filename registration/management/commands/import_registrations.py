@@ -0,0 +1,40 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from registration.mongodb import get_mongodb, IMPORT_CHUNK_SIZE
+
+
+class Command(BaseCommand):
+    help = "Import registrations from a CSV file with a header row"
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_path', help="CSV with name, admission_no, email, phone, branch and year columns")
+        parser.add_argument('--chunk-size', type=int, default=IMPORT_CHUNK_SIZE,
+                            help="Rows per insert_many call")
+
+    def handle(self, *args, **options):
+        try:
+            mongodb = get_mongodb()
+        except Exception as e:
+            raise CommandError(f"MongoDB connection is not available: {e}")
+        if options['chunk_size'] < 1:
+            raise CommandError("--chunk-size must be a positive integer")
+
+        try:
+            with open(options['csv_path'], newline='', encoding='utf-8-sig') as csv_file:
+                rows = list(csv.DictReader(csv_file))
+        except OSError as e:
+            raise CommandError(f"Could not read {options['csv_path']}: {e}")
+
+        report = mongodb.bulk_create_registrations(rows, chunk_size=options['chunk_size'])
+
+        for entry in report:
+            if entry['status'] != 'created':
+                # +2 accounts for the header and 1-based spreadsheet rows
+                self.stderr.write(f"Row {entry['row'] + 2}: {entry['status']} - {entry['error']}")
+
+        created = sum(1 for entry in report if entry['status'] == 'created')
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {created} of {len(report)} registrations"
+        ))
@@ -0,0 +1,38 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+import time
+
+from .monitoring import REQUEST_LATENCY
+
+
+class RequestTimingMiddleware:
+    """Records each request's latency in REQUEST_LATENCY, keyed by URL name"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        response = self.get_response(request)
+        self._observe(request, response, started)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        self._observe(request, response, started)
+        return response
+
+    @staticmethod
+    def _observe(request, response, started):
+        match = request.resolver_match
+        endpoint = match.url_name if match and match.url_name else 'unmatched'
+        REQUEST_LATENCY.observe(
+            (endpoint, request.method, str(response.status_code)), time.perf_counter() - started
+        )
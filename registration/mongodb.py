@@ -1,143 +1,771 @@
 import os
-from pymongo import MongoClient
-from pymongo.errors import ConnectionFailure, DuplicateKeyError
+from pymongo import MongoClient, UpdateOne, timeout
+from pymongo.errors import BulkWriteError, ConnectionFailure, DuplicateKeyError, OperationFailure, PyMongoError
+from pymongo.write_concern import WriteConcern
+from pymongo.read_preferences import Nearest, Primary, PrimaryPreferred, Secondary, SecondaryPreferred
 from bson import ObjectId
+from bson.errors import InvalidId
 from datetime import datetime, UTC
+from contextlib import contextmanager
+from pathlib import Path
+import base64
+import json
+import re
+import threading
 import uuid
 import logging
 from dotenv import load_dotenv
+from . import read_cache
+from .batching import InsertBatcher
+from .bloom import DuplicateFilter
+from .monitoring import CommandTimingListener, PoolStatsListener
+from .spool import RegistrationSpool
+from .stats_cache import UNKNOWN_STATS_GROUP, RegistrationStatsCache
+from .validators import RegistrationValidationError, validate_registration
+from .versioning import CollectionVersion
 
 
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
-class MongoDBConnection:
-    def __init__(self, use_atlas=True):
-        try:
-            if use_atlas:
+DATABASE_NAME = 'iste_registration'
+COLLECTION_NAME = 'registrations'
 
-                connection_string = os.getenv('MONGODB_CONNECTION_STRING')
-                if not connection_string:
-                    raise Exception("MONGODB_CONNECTION_STRING not found in environment variables")
-                
-                self.client = MongoClient(connection_string, serverSelectionTimeoutMS=10000)
-            else:
+# Seconds a worker trusts its cached stats before re-reading them. The
+# re-read may itself be served from the shared read cache, so other workers'
+# inserts can be missing from /api/stats/ for up to STATS_CACHE_TTL plus
+# READ_CACHE_TTL_STATS seconds
+STATS_CACHE_TTL = float(os.getenv('STATS_CACHE_TTL', '30'))
 
-                self.client = MongoClient(
-                    'mongodb://localhost:27017/', 
-                    serverSelectionTimeoutMS=5000
-                )
+# Seconds a worker trusts its cached collection version, which bounds how
+# long a conditional GET can be answered 304 after another worker's insert
+COLLECTION_VERSION_TTL = float(os.getenv('COLLECTION_VERSION_TTL', '2'))
 
-            self.client.admin.command('ping')
+# Upper bound on a single page from get_registrations, whatever the client asks for
+MAX_PAGE_SIZE = int(os.getenv('REGISTRATIONS_MAX_PAGE_SIZE', '500'))
+
+# Supports the keyset walk over (created_at, _id) used for pagination
+LIST_INDEX = [('is_active', 1), ('created_at', 1), ('_id', 1)]
+# Same walk restricted to one branch, so ?branch= lists need no in-memory sort
+BRANCH_LIST_INDEX = [('is_active', 1), ('branch', 1), ('created_at', 1), ('_id', 1)]
+LIST_SORT = [('created_at', -1), ('_id', -1)]
+
+# Returned by the status endpoint; contact details are left out
+STATUS_FIELDS = ['registration_id', 'name', 'branch', 'year', 'created_at']
+# Point lookups of one active registration by its public id. The unique
+# registration_id index alone would need a FETCH to check is_active; this one
+# also carries STATUS_FIELDS, so the status endpoint is answered from the index
+REGISTRATION_ID_INDEX = [('registration_id', 1), ('is_active', 1),
+                         *((field, 1) for field in STATUS_FIELDS if field != 'registration_id')]
+# Earlier index definitions that a current one replaces
+SUPERSEDED_INDEXES = ['registration_id_1_is_active_1']
+
+# ?field= of the search endpoint -> the normalised, indexed key it matches.
+# admission_no and email use their unique indexes; names are matched on a
+# lower-cased copy so the prefix scan is case-insensitive
+SEARCH_KEYS = {'admission_no': 'admission_no', 'email': 'email', 'name': 'name_lower'}
+# name_lower is not unique, so _id breaks ties and keeps the walk in index order
+NAME_SEARCH_INDEX = [('name_lower', 1), ('_id', 1)]
+SEARCH_MAX_PAGE_SIZE = int(os.getenv('SEARCH_MAX_PAGE_SIZE', '50'))
+MAX_SEARCH_TERM_LENGTH = 100
+
+# Fields written by the roster export, in column order
+EXPORT_FIELDS = [
+    'registration_id', 'name', 'admission_no', 'email', 'phone',
+    'branch', 'year', 'created_at', 'updated_at'
+]
+EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', '1000'))
+
+# Fields a client may pick with ?fields= when listing registrations
+LIST_FIELDS = frozenset(EXPORT_FIELDS + ['_id', 'email_domain', 'is_active'])
+# Always read so the continuation token can be built, even if not returned
+CURSOR_FIELDS = ('created_at', '_id')
+
+# Rows per insert_many call when importing registrations in bulk
+IMPORT_CHUNK_SIZE = int(os.getenv('IMPORT_CHUNK_SIZE', '1000'))
+DUPLICATE_KEY_ERROR = 11000
+
+# 'direct' inserts each registration on its own; 'batched' groups concurrent
+# inserts in this process into one insert_many per WRITE_BATCH_MAX_DELAY_MS;
+# 'spooled' appends to a local journal that is drained to MongoDB later
+WRITE_MODES = ('direct', 'batched', 'spooled')
+WRITE_MODE = os.getenv('MONGODB_WRITE_MODE', 'direct')
+WRITE_BATCH_MAX_SIZE = int(os.getenv('WRITE_BATCH_MAX_SIZE', '500'))
+WRITE_BATCH_MAX_DELAY_MS = float(os.getenv('WRITE_BATCH_MAX_DELAY_MS', '5'))
+
+SPOOL_DIR = os.getenv('REGISTRATION_SPOOL_DIR', str(Path(__file__).resolve().parent.parent / 'spool'))
+SPOOL_RETRY_SECONDS = float(os.getenv('REGISTRATION_SPOOL_RETRY_SECONDS', '5'))
+# Budget for confirming a likely duplicate before spooling, so an
+# unreachable cluster cannot hold up the 202 for the server selection timeout
+SPOOL_DUPLICATE_CHECK_TIMEOUT_MS = int(os.getenv('SPOOL_DUPLICATE_CHECK_TIMEOUT_MS', '200'))
+
+# Bloom filter over admission numbers and emails (two keys per registration);
+# memory is about 1.2 bytes per key at a 1% false-positive rate
+DUPLICATE_FILTER_CAPACITY = int(os.getenv('DUPLICATE_FILTER_CAPACITY', '200000'))
+DUPLICATE_FILTER_ERROR_RATE = float(os.getenv('DUPLICATE_FILTER_ERROR_RATE', '0.01'))
+
+# Environment variable, MongoClient option, type
+CLIENT_OPTION_ENV = (
+    ('MONGODB_MAX_POOL_SIZE', 'maxPoolSize', int),
+    ('MONGODB_MIN_POOL_SIZE', 'minPoolSize', int),
+    ('MONGODB_MAX_IDLE_TIME_MS', 'maxIdleTimeMS', int),
+    ('MONGODB_WAIT_QUEUE_TIMEOUT_MS', 'waitQueueTimeoutMS', int),
+    ('MONGODB_CONNECT_TIMEOUT_MS', 'connectTimeoutMS', int),
+    ('MONGODB_SOCKET_TIMEOUT_MS', 'socketTimeoutMS', int),
+    ('MONGODB_COMPRESSORS', 'compressors', str),
+)
+
+READ_PREFERENCES = {
+    'primary': Primary,
+    'primaryPreferred': PrimaryPreferred,
+    'secondary': Secondary,
+    'secondaryPreferred': SecondaryPreferred,
+    'nearest': Nearest,
+}
+
+DUPLICATE_FIELD_MESSAGES = {
+    'admission_no': "Student already registered with this admission number",
+    'email': "Student already registered with this email",
+}
+
+
+class DuplicateRegistrationError(ValueError):
+    """Raised when an insert hits one of the unique registration indexes"""
+
+    def __init__(self, field=None):
+        self.field = field
+        super().__init__(DUPLICATE_FIELD_MESSAGES.get(
+            field, "Student already registered with this admission number or email"
+        ))
+
+
+def duplicate_key_field(error):
+    """Return the field whose unique index raised a DuplicateKeyError"""
+    return write_error_field(error.details or {'errmsg': str(error)})
+
+
+def write_error_field(details):
+    """Return the field named by a duplicate key write error's details"""
+    key_pattern = details.get('keyPattern')
+    if key_pattern:
+        return next(iter(key_pattern))
+
+    # Older servers only report the index name inside the message,
+    # e.g. "... index: admission_no_1 dup key: { ... }"
+    message = details.get('errmsg', '')
+    marker = 'index: '
+    if marker not in message:
+        return None
+    index_name = message.split(marker, 1)[1].split(' ', 1)[0]
+    return index_name.rsplit('_', 1)[0] if index_name.endswith('_1') else index_name
+
+
+def get_connection_settings(use_atlas=True):
+    """Return the connection string and server selection timeout to use"""
+    timeout_ms = os.getenv('MONGODB_SERVER_SELECTION_TIMEOUT_MS')
+    if use_atlas:
+        connection_string = os.getenv('MONGODB_CONNECTION_STRING')
+        if not connection_string:
+            raise Exception("MONGODB_CONNECTION_STRING not found in environment variables")
+        return connection_string, int(timeout_ms or 10000)
+    return 'mongodb://localhost:27017/', int(timeout_ms or 5000)
+
+
+def get_client_options():
+    """Return pool, timeout and compression options for MongoClient.
+
+    Only options whose MONGODB_* variable is set are passed, so anything
+    left unset keeps the driver default.
+    """
+    options = {}
+    for env_name, option, cast in CLIENT_OPTION_ENV:
+        value = os.getenv(env_name)
+        if value:
+            options[option] = cast(value)
+    return options
+
+
+def get_read_preference():
+    """Read preference for the read-only list, export and stats queries.
+
+    MONGODB_MAX_STALENESS_SECONDS bounds how far behind the primary a
+    secondary may be and still serve these reads (the server minimum is 90).
+    """
+    name = os.getenv('MONGODB_READ_PREFERENCE', 'primary')
+    if name not in READ_PREFERENCES:
+        raise Exception(f"MONGODB_READ_PREFERENCE must be one of: {', '.join(READ_PREFERENCES)}")
+    if name == 'primary':
+        return Primary()
+
+    max_staleness = int(os.getenv('MONGODB_MAX_STALENESS_SECONDS', '-1'))
+    if max_staleness != -1 and max_staleness < 90:
+        raise Exception("MONGODB_MAX_STALENESS_SECONDS must be at least 90")
+    return READ_PREFERENCES[name](max_staleness=max_staleness)
+
+
+def get_write_concern(mode):
+    """Write concern for a write mode, from MONGODB_WRITE_CONCERN_<MODE>.
+
+    Takes a ``w`` value such as "majority" or "1"; unset keeps the server
+    default. w=0 is refused because callers need each insert's outcome.
+    """
+    if mode not in WRITE_MODES:
+        raise Exception(f"MONGODB_WRITE_MODE must be one of: {', '.join(WRITE_MODES)}")
+    w = os.getenv(f'MONGODB_WRITE_CONCERN_{mode.upper()}')
+    if not w:
+        return None
+    w = int(w) if w.isdigit() else w
+    if w == 0:
+        raise Exception("Unacknowledged writes (w=0) are not supported")
+    return WriteConcern(w=w)
+
+
+def write_error_exception(write_error):
+    """Exception to raise for one document's write error from insert_many"""
+    if write_error.get('code') == DUPLICATE_KEY_ERROR:
+        return DuplicateRegistrationError(write_error_field(write_error))
+    return Exception(write_error.get('errmsg', 'Write failed'))
+
+
+def normalise_name(name):
+    """Form of a name stored in name_lower and matched by name search"""
+    return name.strip().lower()
+
+
+def build_registration_document(data):
+    """Normalise submitted form data into a registration document"""
+    now = datetime.now(UTC)
+    email = data['email'].lower().strip()
+    return {
+        'registration_id': str(uuid.uuid4()),
+        'name': data['name'].strip(),
+        'name_lower': normalise_name(data['name']),
+        'admission_no': data['admission_no'].upper().strip(),
+        'email': email,
+        'email_domain': email.rpartition('@')[2],
+        'phone': data['phone'].strip(),
+        'branch': data['branch'].upper().strip(),
+        'year': int(data['year']),
+        'is_active': True,
+        'created_at': now,
+        'updated_at': now
+    }
+
+
+def public_registration(registration):
+    """The stored fields a registration is echoed back with; internal ones are left out"""
+    return {field: registration[field] for field in EXPORT_FIELDS}
+
+
+def encode_page_token(registration):
+    """Build the opaque continuation token pointing after this registration"""
+    position = [registration['created_at'].isoformat(), str(registration['_id'])]
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+
+def decode_page_token(token):
+    """Turn a continuation token back into its (created_at, _id) position"""
+    try:
+        created_at, object_id = json.loads(base64.urlsafe_b64decode(token.encode()))
+        return datetime.fromisoformat(created_at), ObjectId(object_id)
+    except (ValueError, TypeError, InvalidId):
+        raise ValueError("Invalid pagination cursor")
+
+
+def guess_search_field(term):
+    """Pick the field a search term most likely refers to"""
+    if '@' in term:
+        return 'email'
+    if term.strip().isdigit():
+        return 'admission_no'
+    return 'name'
+
+
+def normalise_search_term(field, term):
+    """Normalise a search prefix the same way the field is stored"""
+    if field == 'admission_no':
+        return term.strip().upper()
+    if field == 'email':
+        return term.strip().lower()
+    return normalise_name(term)
+
+
+def search_sort(field):
+    """Index order a search walks in; unique fields need no tie-breaker"""
+    key = SEARCH_KEYS[field]
+    return [(key, 1), ('_id', 1)] if field == 'name' else [(key, 1)]
+
+
+def search_query(field, term, after=None):
+    """Build the find() filter for a prefix search.
+
+    An anchored, case-sensitive regex is turned into a range scan on the
+    field's index. ``after`` is a decoded (value, _id) position from the
+    previous page.
+    """
+    key = SEARCH_KEYS[field]
+    query = {'is_active': True, key: {'$regex': '^' + re.escape(term)}}
+    if after:
+        value, object_id = after
+        if field == 'name':
+            query['$or'] = [
+                {key: {'$gt': value}},
+                {key: value, '_id': {'$gt': object_id}}
+            ]
+        else:
+            query[key]['$gt'] = value
+    return query
+
+
+def encode_search_token(field, registration):
+    """Build the continuation token pointing after this search result"""
+    position = [field, registration[SEARCH_KEYS[field]], str(registration['_id'])]
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+
+def decode_search_token(token, field):
+    """Turn a search continuation token back into its (value, _id) position"""
+    try:
+        token_field, value, object_id = json.loads(base64.urlsafe_b64decode(token.encode()))
+        if token_field != field or not isinstance(value, str):
+            raise ValueError
+        return value, ObjectId(object_id)
+    except (ValueError, TypeError, InvalidId):
+        raise ValueError("Invalid pagination cursor")
+
+
+def list_projection(fields=None):
+    """Build the find() projection for a page of the selected fields"""
+    if not fields:
+        return None
+    return dict.fromkeys([*fields, *CURSOR_FIELDS], 1)
+
+
+def registration_projection(fields=None):
+    """Build the find_one() projection for a single registration"""
+    if not fields:
+        return None
+    return {**dict.fromkeys(fields, 1), '_id': 0}
+
+
+def registrations_query(branch=None, after=None):
+    """Build the find() filter used to list registrations.
+
+    ``after`` is a decoded (created_at, _id) position; only registrations
+    that sort after it in (created_at desc, _id desc) order are matched.
+    """
+    query = {'is_active': True}
+    if branch:
+        # Branches are stored upper-cased, so an exact match keeps this an
+        # equality on BRANCH_LIST_INDEX instead of an unanchored regex scan
+        query['branch'] = branch.strip().upper()
+    if after:
+        created_at, object_id = after
+        query['$or'] = [
+            {'created_at': {'$lt': created_at}},
+            {'created_at': created_at, '_id': {'$lt': object_id}}
+        ]
+    return query
+
+
+STATS_INDEX = [('is_active', 1), ('branch', 1), ('year', 1), ('email_domain', 1)]
+
+# One round trip for every stats section. The $match/$project prefix only
+# touches fields in STATS_INDEX, so the scan is covered by that index.
+STATS_PIPELINE = [
+    {'$match': {'is_active': True}},
+    {'$project': {'_id': 0, 'branch': 1, 'year': 1, 'email_domain': 1}},
+    {'$facet': {
+        'total': [{'$count': 'count'}],
+        'branch_wise': [
+            {'$group': {'_id': '$branch', 'count': {'$sum': 1}}},
+            {'$sort': {'_id': 1}}
+        ],
+        'email_domains': [
+            {'$group': {'_id': '$email_domain', 'count': {'$sum': 1}}},
+            {'$sort': {'_id': 1}}
+        ],
+        'year_wise': [
+            {'$group': {'_id': '$year', 'count': {'$sum': 1}}},
+            {'$sort': {'_id': 1}}
+        ]
+    }}
+]
+
+
+def count_groups(results):
+    """Turn $group results into {key: count}, folding a null key into UNKNOWN_STATS_GROUP"""
+    counts = {}
+    for result in results:
+        key = UNKNOWN_STATS_GROUP if result['_id'] is None else result['_id']
+        counts[key] = counts.get(key, 0) + result['count']
+    return counts
+
+
+def build_stats(facets):
+    """Shape the STATS_PIPELINE result into the /api/stats/ payload"""
+    total = facets['total'][0]['count'] if facets['total'] else 0
+    return {
+        'total_registrations': total,
+        'branch_wise': count_groups(facets['branch_wise']),
+        'email_domains': count_groups(facets['email_domains']),
+        'year_wise': {f"Year {result['_id']}": result['count'] for result in facets['year_wise']}
+    }
+
+
+def build_collection_version(count, newest):
+    """Turn the document count and newest registration into a version.
+
+    ``etag`` changes whenever a registration is added; ``last_modified`` is
+    the newest registration's created_at (None for an empty collection).
+    """
+    if newest is None:
+        return {'etag': f"{count}-0", 'last_modified': None}
+    return {'etag': f"{count}-{newest['_id']}", 'last_modified': newest['created_at']}
 
-            self.db = self.client['iste_registration']
-            self.collection = self.db['registrations']
 
-            self.collection.create_index("admission_no", unique=True)
-            self.collection.create_index("email", unique=True)
-            self.collection.create_index("registration_id", unique=True)
+def ensure_indexes(collection):
+    """Create every index the registration queries rely on"""
+    collection.create_index("admission_no", unique=True)
+    collection.create_index("email", unique=True)
+    collection.create_index("registration_id", unique=True)
+    collection.create_index(STATS_INDEX)
+    collection.create_index(LIST_INDEX)
+    collection.create_index(BRANCH_LIST_INDEX)
+    collection.create_index(REGISTRATION_ID_INDEX)
+    collection.create_index(NAME_SEARCH_INDEX)
+    for name in SUPERSEDED_INDEXES:
+        try:
+            collection.drop_index(name)
+        except OperationFailure:
+            pass  # never created, or already dropped
+
+
+class MongoDBConnection:
+    def __init__(self, use_atlas=True):
+        # MongoClient connects in the background, so construction does no
+        # blocking I/O; indexes are created by `manage.py ensure_indexes`
+        try:
+            connection_string, timeout_ms = get_connection_settings(use_atlas)
+            self.pool_stats = PoolStatsListener()
+            self.client = MongoClient(
+                connection_string,
+                serverSelectionTimeoutMS=timeout_ms,
+                event_listeners=[self.pool_stats, CommandTimingListener()],
+                **get_client_options()
+            )
+
+            self.db = self.client[DATABASE_NAME]
+            # Writes, registration_exists and get_registration_by_id always
+            # use the primary, even if the connection string says otherwise
+            self.collection = self.db.get_collection(
+                COLLECTION_NAME,
+                read_preference=Primary(),
+                write_concern=get_write_concern(WRITE_MODE)
+            )
+            # Read-only endpoints may be routed away from the primary
+            read_preference = get_read_preference()
+            self.read_collection = self.collection.with_options(read_preference=read_preference)
+            self.secondary_reads = read_preference.mode != Primary().mode
+            self.stats_cache = RegistrationStatsCache(ttl=STATS_CACHE_TTL)
+            self.version = CollectionVersion(ttl=COLLECTION_VERSION_TTL)
+            self._last_write = None
+            self._last_write_lock = threading.Lock()
+            self.batcher = None
+            if WRITE_MODE == 'batched':
+                self.batcher = InsertBatcher(
+                    self.insert_documents,
+                    max_size=WRITE_BATCH_MAX_SIZE,
+                    max_delay=WRITE_BATCH_MAX_DELAY_MS / 1000
+                )
             
+        except Exception as e:
+            logger.error(f"MongoDB setup error: {e}")
+            raise
+    
+    def ping(self):
+        """Round trip to the server to confirm it is reachable"""
+        try:
+            self.client.admin.command('ping')
             logger.info("Connected to MongoDB successfully")
-            
         except ConnectionFailure as e:
             logger.error(f"Failed to connect to MongoDB: {e}")
             raise Exception("MongoDB connection failed. Check your connection string and network.")
-        except Exception as e:
-            logger.error(f"MongoDB setup error: {e}")
-            raise
+    
+    @contextmanager
+    def write_session(self):
+        """Session for a write whose cluster time later reads must observe.
+
+        Only used when reads go to secondaries; yields None otherwise.
+        """
+        if not self.secondary_reads:
+            yield None
+            return
+        with self.client.start_session(causal_consistency=True) as session:
+            yield session
+            with self._last_write_lock:
+                if session.operation_time is not None and (
+                        self._last_write is None or session.operation_time > self._last_write[1]):
+                    self._last_write = (session.cluster_time, session.operation_time)
+    
+    @contextmanager
+    def read_session(self):
+        """Causally consistent session for reads routed to secondaries.
+
+        The session is advanced past this process's latest write, so a
+        secondary waits until it has replicated that write before answering.
+        """
+        if not self.secondary_reads or self._last_write is None:
+            yield None
+            return
+        with self.client.start_session(causal_consistency=True) as session:
+            cluster_time, operation_time = self._last_write
+            session.advance_cluster_time(cluster_time)
+            session.advance_operation_time(operation_time)
+            yield session
     
     def create_registration(self, data):
         """Create a new registration"""
         try:
-            registration_data = {
-                'registration_id': str(uuid.uuid4()),
-                'name': data['name'].strip(),
-                'admission_no': data['admission_no'].upper().strip(),
-                'email': data['email'].lower().strip(),
-                'phone': data['phone'].strip(),
-                'branch': data['branch'].upper().strip(),
-                'year': int(data['year']),
-                'is_active': True,
-                'created_at': datetime.now(UTC),  
-                'updated_at': datetime.now(UTC)   
-            }
+            registration_data = build_registration_document(data)
+            likely_taken = get_duplicate_filter().maybe_taken(registration_data)
+            
+            if WRITE_MODE == 'spooled':
+                # A spooled duplicate would only be rejected when the spool
+                # drains, after the client was told it was accepted
+                try:
+                    with timeout(SPOOL_DUPLICATE_CHECK_TIMEOUT_MS / 1000):
+                        field = self.find_taken_field(registration_data, likely_taken)
+                except PyMongoError as e:
+                    # Accept it anyway; if it is a duplicate it ends up in rejected.jsonl
+                    logger.warning(f"Duplicate check skipped for spooled registration: {e}")
+                    field = None
+                if field:
+                    raise DuplicateRegistrationError(field)
+                # Delivered (and counted in the stats) when the spool drains
+                get_spool().append(registration_data)
+                logger.debug("Registration spooled: %s", registration_data['registration_id'])
+                return registration_data
             
-            result = self.collection.insert_one(registration_data)
-            registration_data['_id'] = result.inserted_id
+            # Likely duplicates are confirmed with an index-only lookup
+            # instead of paying for an insert that the unique index rejects
+            field = self.find_taken_field(registration_data, likely_taken)
+            if field:
+                raise DuplicateRegistrationError(field)
             
-            logger.info(f"Registration created: {registration_data['name']} ({registration_data['admission_no']})")
+            if self.batcher:
+                # insert_many fills in registration_data['_id']
+                write_error = self.batcher.submit(registration_data)
+                if write_error:
+                    raise write_error_exception(write_error)
+            else:
+                with self.write_session() as session:
+                    result = self.collection.insert_one(registration_data, session=session)
+                registration_data['_id'] = result.inserted_id
+            self.stats_cache.record(registration_data)
+            self.version.invalidate()
+            read_cache.invalidate()
+            get_duplicate_filter().add(registration_data)
+            
+            logger.debug("Registration created: %s (%s)", registration_data['name'], registration_data['admission_no'])
             return registration_data
             
         except DuplicateKeyError as e:
-            logger.warning(f"Duplicate registration attempt: {data.get('admission_no', 'Unknown')}")
-            raise ValueError("Student already registered with this admission number or email")
+            field = duplicate_key_field(e)
+            if field:
+                get_duplicate_filter().add(registration_data, fields=(field,))
+            logger.warning("Duplicate registration attempt on %s: %s", field, data.get('admission_no', 'Unknown'))
+            raise DuplicateRegistrationError(field)
+        except DuplicateRegistrationError as e:
+            if e.field:
+                get_duplicate_filter().add(registration_data, fields=(e.field,))
+            logger.warning("Duplicate registration attempt on %s: %s", e.field, data.get('admission_no', 'Unknown'))
+            raise
         except Exception as e:
             logger.error(f"Error creating registration: {e}")
             raise
     
-    def get_registrations(self, branch=None, limit=100):
-        """Get registrations with optional filtering"""
+    def find_taken_field(self, registration, fields):
+        """Return the first of ``fields`` whose value is already registered.
+
+        Each lookup is covered by that field's unique index.
+        """
+        for field in fields:
+            if self.collection.find_one({field: registration[field]}, {'_id': 0, field: 1}):
+                return field
+        return None
+    
+    def scan_field(self, field):
+        """Yield every stored value of an indexed field from an index-only scan"""
+        cursor = self.read_collection.find({}, {'_id': 0, field: 1}).hint([(field, 1)])
+        return (document[field] for document in cursor.batch_size(EXPORT_BATCH_SIZE) if field in document)
+    
+    def insert_documents(self, documents):
+        """Insert documents with one unordered insert_many.
+
+        Returns a dict mapping the index of each rejected document to its
+        write error; the other documents were inserted.
+        """
         try:
-            query = {'is_active': True}
+            with self.write_session() as session:
+                self.collection.insert_many(documents, ordered=False, session=session)
+        except BulkWriteError as e:
+            return {write_error['index']: write_error for write_error in e.details.get('writeErrors', [])}
+        return {}
+    
+    def upsert_documents(self, documents):
+        """Insert documents keyed by registration_id, skipping ones already stored.
+
+        Safe to replay: a registration_id that is already present is left
+        untouched. Returns {index: write_error} like insert_documents.
+        """
+        requests = [
+            UpdateOne({'registration_id': document['registration_id']}, {'$setOnInsert': document}, upsert=True)
+            for document in documents
+        ]
+        failures = {}
+        try:
+            with self.write_session() as session:
+                upserted = self.collection.bulk_write(requests, ordered=False, session=session).upserted_ids
+        except BulkWriteError as e:
+            failures = {write_error['index']: write_error for write_error in e.details.get('writeErrors', [])}
+            upserted = {entry['index']: entry['_id'] for entry in e.details.get('upserted', [])}
+        for index in upserted:
+            self.stats_cache.record(documents[index])
+            get_duplicate_filter().add(documents[index])
+        if upserted:
+            self.version.invalidate()
+            read_cache.invalidate()
+        return failures
+    
+    def bulk_create_registrations(self, rows, chunk_size=IMPORT_CHUNK_SIZE):
+        """Validate and insert many registrations with unordered insert_many calls.
+
+        Returns one report entry per input row, in input order, with a
+        status of 'created', 'duplicate' or 'invalid'.
+        """
+        report = [None] * len(rows)
+        pending = []
+
+        for row_number, data in enumerate(rows):
+            try:
+                cleaned = validate_registration(data)
+            except RegistrationValidationError as e:
+                report[row_number] = {'row': row_number, 'status': 'invalid',
+                                      'error': str(e), 'errors': e.errors}
+                continue
+            pending.append((row_number, build_registration_document(cleaned)))
+
+        for start in range(0, len(pending), chunk_size):
+            chunk = pending[start:start + chunk_size]
+            failed = self.insert_documents([document for _, document in chunk])
+
+            for index, (row_number, document) in enumerate(chunk):
+                write_error = failed.get(index)
+                if write_error is None:
+                    self.stats_cache.record(document)
+                    get_duplicate_filter().add(document)
+                    report[row_number] = {'row': row_number, 'status': 'created',
+                                          'registration_id': document['registration_id']}
+                elif write_error.get('code') == DUPLICATE_KEY_ERROR:
+                    field = write_error_field(write_error)
+                    report[row_number] = {'row': row_number, 'status': 'duplicate', 'field': field,
+                                          'error': str(DuplicateRegistrationError(field))}
+                else:
+                    report[row_number] = {'row': row_number, 'status': 'invalid',
+                                          'error': write_error.get('errmsg', 'Write failed')}
+
+        self.version.invalidate()
+        read_cache.invalidate()
+        created = sum(1 for entry in report if entry['status'] == 'created')
+        logger.info(f"Bulk import: {created} of {len(rows)} registrations created")
+        return report
+    
+    def get_registrations(self, branch=None, limit=100, after=None, fields=None):
+        """Get one page of registrations, newest first, through the read cache.
+
+        Pages are keyed by the collection version as well, so a cached page
+        never outlives the ETag it was served under.
+        """
+        return read_cache.cached(
+            'registrations',
+            (self.get_collection_version()['etag'], branch, limit, after, fields),
+            lambda: self.query_registrations(branch, limit, after, fields)
+        )
+    
+    def query_registrations(self, branch=None, limit=100, after=None, fields=None):
+        """Get one page of registrations, newest first, with optional filtering"""
+        try:
+            query = registrations_query(branch, after)
+            with self.read_session() as session:
+                cursor = self.read_collection.find(query, list_projection(fields), session=session)
+                registrations = list(cursor.sort(LIST_SORT).limit(min(limit, MAX_PAGE_SIZE)))
             
-            if branch:
-                query['branch'] = {'$regex': f'^{branch.upper()}', '$options': 'i'}
+            logger.debug("Retrieved %d registrations", len(registrations))
+            return registrations
             
-            cursor = self.collection.find(query).sort('created_at', -1).limit(limit)
-            registrations = list(cursor)
+        except Exception as e:
+            logger.error(f"Error fetching registrations: {e}")
+            raise
+    
+    def search_registrations(self, field, term, limit=20, after=None):
+        """Get one page of registrations whose ``field`` starts with ``term``, in index order"""
+        try:
+            projection = dict.fromkeys([*EXPORT_FIELDS, SEARCH_KEYS[field]], 1)
+            with self.read_session() as session:
+                cursor = self.read_collection.find(search_query(field, term, after), projection, session=session)
+                registrations = list(cursor.sort(search_sort(field)).limit(min(limit, SEARCH_MAX_PAGE_SIZE)))
             
-            logger.info(f"Retrieved {len(registrations)} registrations")
+            logger.debug("Search on %s returned %d registrations", field, len(registrations))
             return registrations
             
         except Exception as e:
-            logger.error(f"Error fetching registrations: {e}")
+            logger.error(f"Error searching registrations: {e}")
             raise
     
+    def iter_registrations(self, branch=None, fields=EXPORT_FIELDS, batch_size=EXPORT_BATCH_SIZE):
+        """Yield every matching registration, newest first, without buffering the result set"""
+        projection = dict.fromkeys(fields, 1)
+        projection['_id'] = 0
+        cursor = self.read_collection.find(registrations_query(branch), projection)
+        return cursor.sort(LIST_SORT).batch_size(batch_size)
+    
+    def get_collection_version(self):
+        """Get the collection version used as the list endpoint's validator"""
+        version = self.version.snapshot()
+        if version is None:
+            generation = self.version.generation()
+            with self.read_session() as session:
+                # Covered by LIST_INDEX: one index entry, no document fetch
+                newest = self.read_collection.find_one(
+                    {'is_active': True}, {'_id': 1, 'created_at': 1}, sort=LIST_SORT, session=session
+                )
+            version = build_collection_version(self.read_collection.estimated_document_count(), newest)
+            self.version.seed(version, generation)
+        return version
+    
     def get_registration_stats(self):
-        """Get registration statistics"""
+        """Get registration statistics, served from the stats cache when fresh.
+
+        On a miss the shared read cache is tried before the aggregation, so
+        only one worker per READ_CACHE_TTLS['stats'] runs it. A payload taken
+        from there may already be that old when it is seeded, so stats can
+        lag other workers' inserts by STATS_CACHE_TTL + READ_CACHE_TTLS['stats'].
+        """
+        stats = self.stats_cache.snapshot()
+        if stats is None:
+            stats = read_cache.cached('stats', (), self.compute_registration_stats)
+            self.stats_cache.seed(stats)
+        return stats
+    
+    def compute_registration_stats(self):
+        """Compute registration statistics from the collection"""
         try:
-            total = self.collection.count_documents({'is_active': True})
-            branch_pipeline = [
-                {'$match': {'is_active': True}},
-                {'$group': {'_id': '$branch', 'count': {'$sum': 1}}},
-                {'$sort': {'_id': 1}}
-            ]
-            branch_stats = {}
-            for result in self.collection.aggregate(branch_pipeline):
-                branch_stats[result['_id']] = result['count']
-            email_pipeline = [
-                {'$match': {'is_active': True}},
-                {'$project': {
-                    'domain': {
-                        '$arrayElemAt': [
-                            {'$split': ['$email', '@']}, 1
-                        ]
-                    }
-                }},
-                {'$group': {'_id': '$domain', 'count': {'$sum': 1}}},
-                {'$sort': {'_id': 1}}
-            ]
-            email_stats = {}
-            for result in self.collection.aggregate(email_pipeline):
-                email_stats[result['_id']] = result['count']
-            year_pipeline = [
-                {'$match': {'is_active': True}},
-                {'$group': {'_id': '$year', 'count': {'$sum': 1}}},
-                {'$sort': {'_id': 1}}
-            ]
-            year_stats = {}
-            for result in self.collection.aggregate(year_pipeline):
-                year_stats[f"Year {result['_id']}"] = result['count']
+            with self.read_session() as session:
+                stats = build_stats(next(self.read_collection.aggregate(STATS_PIPELINE, session=session)))
             
-            stats = {
-                'total_registrations': total,
-                'branch_wise': branch_stats,
-                'email_domains': email_stats,
-                'year_wise': year_stats
-            }
-            
-            logger.info(f"Generated stats: {total} total registrations")
+            logger.debug("Generated stats: %d total registrations", stats['total_registrations'])
             return stats
             
         except Exception as e:
@@ -171,20 +799,104 @@ class MongoDBConnection:
             logger.error(f"Error checking registration existence: {e}")
             return False
     
-    def get_registration_by_id(self, registration_id):
-        """Get a single registration by registration_id"""
+    def get_registration_by_id(self, registration_id, fields=None):
+        """Get a single registration by registration_id, through the read cache"""
+        return read_cache.cached(
+            'registration', (registration_id, fields),
+            lambda: self.find_registration_by_id(registration_id, fields),
+            versioned=False
+        )
+    
+    def find_registration_by_id(self, registration_id, fields=None):
+        """Get a single registration by registration_id.
+
+        One seek on REGISTRATION_ID_INDEX; with ``fields`` only those are
+        returned, and ``_id`` is left out, so STATUS_FIELDS is a covered query.
+        """
+        projection = registration_projection(fields)
         try:
-            registration = self.collection.find_one({
-                'registration_id': registration_id,
-                'is_active': True
-            })
-            return registration
+            return self.collection.find_one({'registration_id': registration_id, 'is_active': True}, projection)
         except Exception as e:
             logger.error(f"Error fetching registration by ID: {e}")
-            return None
-try:
-    mongodb = MongoDBConnection()
-    logger.info("MongoDB connection instance created successfully")
-except Exception as e:
-    logger.error(f"Failed to initialize MongoDB connection: {e}")
-    mongodb = None
\ No newline at end of file
+            raise
+
+
+_mongodb = None
+_mongodb_pid = None
+_mongodb_lock = threading.Lock()
+
+
+def get_mongodb():
+    """Return this process's MongoDBConnection, creating it on first use.
+
+    MongoClient is not fork-safe, so a process that inherited a connection
+    from its parent (e.g. a gunicorn worker) builds its own.
+    """
+    global _mongodb, _mongodb_pid
+    pid = os.getpid()
+    if _mongodb is None or _mongodb_pid != pid:
+        with _mongodb_lock:
+            if _mongodb is None or _mongodb_pid != pid:
+                _mongodb = MongoDBConnection()
+                _mongodb_pid = pid
+                logger.info("MongoDB connection instance created successfully")
+    return _mongodb
+
+
+_spool = None
+_spool_pid = None
+_spool_lock = threading.Lock()
+
+
+def get_spool():
+    """Return this process's RegistrationSpool, starting its drain thread"""
+    global _spool, _spool_pid
+    pid = os.getpid()
+    if _spool is None or _spool_pid != pid:
+        with _spool_lock:
+            if _spool is None or _spool_pid != pid:
+                _spool = RegistrationSpool(
+                    SPOOL_DIR,
+                    lambda documents: get_mongodb().upsert_documents(documents),
+                    retry_seconds=SPOOL_RETRY_SECONDS
+                )
+                _spool.start()
+                _spool_pid = pid
+    return _spool
+
+
+def start_spool_drain():
+    """Start this process's spool drain thread if registrations are spooled.
+
+    Called by the WSGI and ASGI entry points, so registrations journaled
+    (and answered 202) before a restart are delivered without waiting for
+    the next submission.
+    """
+    if WRITE_MODE == 'spooled':
+        get_spool()
+
+
+_duplicate_filter = None
+_duplicate_filter_pid = None
+_duplicate_filter_lock = threading.Lock()
+
+
+def get_duplicate_filter(warm=None):
+    """Return this process's DuplicateFilter, warming it in the background on first use.
+
+    The first call passes the new filter to ``warm``; by default it is
+    warmed in a thread from this process's MongoDBConnection. The async
+    connection passes its own, so an ASGI worker needs no sync client.
+    """
+    global _duplicate_filter, _duplicate_filter_pid
+    pid = os.getpid()
+    if _duplicate_filter is None or _duplicate_filter_pid != pid:
+        with _duplicate_filter_lock:
+            if _duplicate_filter is None or _duplicate_filter_pid != pid:
+                _duplicate_filter = DuplicateFilter(DUPLICATE_FILTER_CAPACITY, DUPLICATE_FILTER_ERROR_RATE)
+                if warm is None:
+                    _duplicate_filter.start(lambda field: get_mongodb().scan_field(field))
+                else:
+                    warm(_duplicate_filter)
+                _duplicate_filter_pid = pid
+    return _duplicate_filter
@@ -0,0 +1,308 @@
+from pymongo import AsyncMongoClient, timeout
+from pymongo.errors import BulkWriteError, DuplicateKeyError, PyMongoError
+from pymongo.read_preferences import Primary
+from contextlib import asynccontextmanager
+import asyncio
+import logging
+
+from .mongodb import (
+    DATABASE_NAME,
+    COLLECTION_NAME,
+    EXPORT_BATCH_SIZE,
+    EXPORT_FIELDS,
+    LIST_SORT,
+    MAX_PAGE_SIZE,
+    SEARCH_KEYS,
+    SEARCH_MAX_PAGE_SIZE,
+    SPOOL_DUPLICATE_CHECK_TIMEOUT_MS,
+    STATS_PIPELINE,
+    STATS_CACHE_TTL,
+    COLLECTION_VERSION_TTL,
+    WRITE_BATCH_MAX_DELAY_MS,
+    WRITE_BATCH_MAX_SIZE,
+    WRITE_MODE,
+    DuplicateRegistrationError,
+    build_registration_document,
+    build_collection_version,
+    build_stats,
+    duplicate_key_field,
+    get_client_options,
+    get_connection_settings,
+    get_duplicate_filter,
+    get_read_preference,
+    get_spool,
+    get_write_concern,
+    write_error_exception,
+    list_projection,
+    registration_projection,
+    registrations_query,
+    search_query,
+    search_sort,
+)
+from . import read_cache
+from .batching import AsyncInsertBatcher
+from .monitoring import CommandTimingListener, PoolStatsListener
+from .stats_cache import RegistrationStatsCache
+from .versioning import CollectionVersion
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncMongoDBConnection:
+    """Async counterpart of MongoDBConnection for the ASGI views.
+
+    AsyncMongoClient connects lazily, so building it does no I/O; indexes
+    are created by `manage.py ensure_indexes`.
+    """
+
+    def __init__(self, use_atlas=True):
+        connection_string, timeout_ms = get_connection_settings(use_atlas)
+        self.pool_stats = PoolStatsListener()
+        self.client = AsyncMongoClient(
+            connection_string,
+            serverSelectionTimeoutMS=timeout_ms,
+            event_listeners=[self.pool_stats, CommandTimingListener()],
+            **get_client_options()
+        )
+        self.db = self.client[DATABASE_NAME]
+        self.collection = self.db.get_collection(
+            COLLECTION_NAME,
+            read_preference=Primary(),
+            write_concern=get_write_concern(WRITE_MODE)
+        )
+        read_preference = get_read_preference()
+        self.read_collection = self.collection.with_options(read_preference=read_preference)
+        self.secondary_reads = read_preference.mode != Primary().mode
+        self.stats_cache = RegistrationStatsCache(ttl=STATS_CACHE_TTL)
+        self.version = CollectionVersion(ttl=COLLECTION_VERSION_TTL)
+        self._last_write = None
+        self.batcher = None
+        if WRITE_MODE == 'batched':
+            self.batcher = AsyncInsertBatcher(
+                self.insert_documents,
+                max_size=WRITE_BATCH_MAX_SIZE,
+                max_delay=WRITE_BATCH_MAX_DELAY_MS / 1000
+            )
+
+    @asynccontextmanager
+    async def write_session(self):
+        """Async version of MongoDBConnection.write_session"""
+        if not self.secondary_reads:
+            yield None
+            return
+        async with self.client.start_session(causal_consistency=True) as session:
+            yield session
+            if session.operation_time is not None and (
+                    self._last_write is None or session.operation_time > self._last_write[1]):
+                self._last_write = (session.cluster_time, session.operation_time)
+
+    @asynccontextmanager
+    async def read_session(self):
+        """Async version of MongoDBConnection.read_session"""
+        if not self.secondary_reads or self._last_write is None:
+            yield None
+            return
+        async with self.client.start_session(causal_consistency=True) as session:
+            cluster_time, operation_time = self._last_write
+            session.advance_cluster_time(cluster_time)
+            session.advance_operation_time(operation_time)
+            yield session
+
+    async def create_registration(self, data):
+        """Create a new registration"""
+        try:
+            registration_data = build_registration_document(data)
+            likely_taken = self.duplicate_filter().maybe_taken(registration_data)
+
+            if WRITE_MODE == 'spooled':
+                try:
+                    with timeout(SPOOL_DUPLICATE_CHECK_TIMEOUT_MS / 1000):
+                        field = await self.find_taken_field(registration_data, likely_taken)
+                except PyMongoError as e:
+                    logger.warning(f"Duplicate check skipped for spooled registration: {e}")
+                    field = None
+                if field:
+                    raise DuplicateRegistrationError(field)
+                await asyncio.to_thread(get_spool().append, registration_data)
+                logger.debug("Registration spooled: %s", registration_data['registration_id'])
+                return registration_data
+
+            field = await self.find_taken_field(registration_data, likely_taken)
+            if field:
+                raise DuplicateRegistrationError(field)
+
+            if self.batcher:
+                # insert_many fills in registration_data['_id']
+                write_error = await self.batcher.submit(registration_data)
+                if write_error:
+                    raise write_error_exception(write_error)
+            else:
+                async with self.write_session() as session:
+                    result = await self.collection.insert_one(registration_data, session=session)
+                registration_data['_id'] = result.inserted_id
+            self.stats_cache.record(registration_data)
+            self.version.invalidate()
+            await read_cache.ainvalidate()
+            self.duplicate_filter().add(registration_data)
+
+            logger.debug("Registration created: %s (%s)", registration_data['name'], registration_data['admission_no'])
+            return registration_data
+
+        except DuplicateKeyError as e:
+            field = duplicate_key_field(e)
+            if field:
+                self.duplicate_filter().add(registration_data, fields=(field,))
+            logger.warning("Duplicate registration attempt on %s: %s", field, data.get('admission_no', 'Unknown'))
+            raise DuplicateRegistrationError(field)
+        except DuplicateRegistrationError as e:
+            if e.field:
+                self.duplicate_filter().add(registration_data, fields=(e.field,))
+            logger.warning("Duplicate registration attempt on %s: %s", e.field, data.get('admission_no', 'Unknown'))
+            raise
+        except Exception as e:
+            logger.error(f"Error creating registration: {e}")
+            raise
+
+    async def find_taken_field(self, registration, fields):
+        """Async version of MongoDBConnection.find_taken_field"""
+        for field in fields:
+            if await self.collection.find_one({field: registration[field]}, {'_id': 0, field: 1}):
+                return field
+        return None
+
+    def duplicate_filter(self):
+        """This process's DuplicateFilter, warmed from this connection on first use"""
+        return get_duplicate_filter(lambda duplicate_filter: duplicate_filter.astart(self.scan_field))
+
+    async def scan_field(self, field):
+        """Async version of MongoDBConnection.scan_field"""
+        cursor = self.read_collection.find({}, {'_id': 0, field: 1}).hint([(field, 1)])
+        async for document in cursor.batch_size(EXPORT_BATCH_SIZE):
+            if field in document:
+                yield document[field]
+
+    async def insert_documents(self, documents):
+        """Async version of MongoDBConnection.insert_documents"""
+        try:
+            async with self.write_session() as session:
+                await self.collection.insert_many(documents, ordered=False, session=session)
+        except BulkWriteError as e:
+            return {write_error['index']: write_error for write_error in e.details.get('writeErrors', [])}
+        return {}
+
+    async def get_registrations(self, branch=None, limit=100, after=None, fields=None):
+        """Async version of MongoDBConnection.get_registrations"""
+        version = await self.get_collection_version()
+        return await read_cache.acached(
+            'registrations',
+            (version['etag'], branch, limit, after, fields),
+            lambda: self.query_registrations(branch, limit, after, fields)
+        )
+
+    async def query_registrations(self, branch=None, limit=100, after=None, fields=None):
+        """Get one page of registrations, newest first, with optional filtering"""
+        try:
+            query = registrations_query(branch, after)
+            async with self.read_session() as session:
+                cursor = self.read_collection.find(query, list_projection(fields), session=session)
+                registrations = await cursor.sort(LIST_SORT).limit(min(limit, MAX_PAGE_SIZE)).to_list()
+
+            logger.debug("Retrieved %d registrations", len(registrations))
+            return registrations
+
+        except Exception as e:
+            logger.error(f"Error fetching registrations: {e}")
+            raise
+
+    def iter_registrations(self, branch=None, fields=EXPORT_FIELDS, batch_size=EXPORT_BATCH_SIZE):
+        """Async version of MongoDBConnection.iter_registrations; iterate with ``async for``"""
+        projection = dict.fromkeys(fields, 1)
+        projection['_id'] = 0
+        cursor = self.read_collection.find(registrations_query(branch), projection)
+        return cursor.sort(LIST_SORT).batch_size(batch_size)
+
+    async def get_collection_version(self):
+        """Get the collection version used as the list endpoint's validator"""
+        version = self.version.snapshot()
+        if version is None:
+            generation = self.version.generation()
+            async with self.read_session() as session:
+                newest = await self.read_collection.find_one(
+                    {'is_active': True}, {'_id': 1, 'created_at': 1}, sort=LIST_SORT, session=session
+                )
+            count = await self.read_collection.estimated_document_count()
+            version = build_collection_version(count, newest)
+            self.version.seed(version, generation)
+        return version
+
+    async def search_registrations(self, field, term, limit=20, after=None):
+        """Async version of MongoDBConnection.search_registrations"""
+        try:
+            projection = dict.fromkeys([*EXPORT_FIELDS, SEARCH_KEYS[field]], 1)
+            async with self.read_session() as session:
+                cursor = self.read_collection.find(search_query(field, term, after), projection, session=session)
+                registrations = await cursor.sort(search_sort(field)).limit(min(limit, SEARCH_MAX_PAGE_SIZE)).to_list()
+
+            logger.debug("Search on %s returned %d registrations", field, len(registrations))
+            return registrations
+
+        except Exception as e:
+            logger.error(f"Error searching registrations: {e}")
+            raise
+
+    async def get_registration_by_id(self, registration_id, fields=None):
+        """Async version of MongoDBConnection.get_registration_by_id"""
+        return await read_cache.acached(
+            'registration', (registration_id, fields),
+            lambda: self.find_registration_by_id(registration_id, fields),
+            versioned=False
+        )
+
+    async def find_registration_by_id(self, registration_id, fields=None):
+        """Async version of MongoDBConnection.find_registration_by_id"""
+        projection = registration_projection(fields)
+        try:
+            return await self.collection.find_one({'registration_id': registration_id, 'is_active': True}, projection)
+        except Exception as e:
+            logger.error(f"Error fetching registration by ID: {e}")
+            raise
+
+    async def get_registration_stats(self):
+        """Get registration statistics, served from the stats cache when fresh.
+
+        Same staleness bound as MongoDBConnection.get_registration_stats.
+        """
+        stats = self.stats_cache.snapshot()
+        if stats is None:
+            stats = await read_cache.acached('stats', (), self.compute_registration_stats)
+            self.stats_cache.seed(stats)
+        return stats
+
+    async def compute_registration_stats(self):
+        """Compute registration statistics from the collection"""
+        try:
+            async with self.read_session() as session:
+                cursor = await self.read_collection.aggregate(STATS_PIPELINE, session=session)
+                stats = build_stats(await cursor.next())
+
+            logger.debug("Generated stats: %d total registrations", stats['total_registrations'])
+            return stats
+
+        except Exception as e:
+            logger.error(f"Error generating stats: {e}")
+            raise
+
+
+_async_mongodb = None
+
+
+def get_async_mongodb():
+    """Return the process-wide async connection, creating it on first use.
+
+    The async client binds to the running event loop, so it is built inside
+    the ASGI server's loop rather than at import time.
+    """
+    global _async_mongodb
+    if _async_mongodb is None:
+        _async_mongodb = AsyncMongoDBConnection()
+    return _async_mongodb
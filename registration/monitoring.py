@@ -0,0 +1,176 @@
+from pymongo.monitoring import CommandListener, ConnectionPoolListener
+import bisect
+import threading
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(label_names, label_values, extra=''):
+    pairs = [f'{name}="{value}"' for name, value in zip(label_names, label_values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Histogram:
+    """Minimal Prometheus-style histogram kept in this process's memory"""
+
+    def __init__(self, name, documentation, label_names, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def observe(self, label_values, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * len(self.buckets), 0.0, 0]
+            if index < len(self.buckets):
+                series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        """Return the histogram in the Prometheus text exposition format"""
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = [(labels, list(counts), total, count) for labels, (counts, total, count) in self._series.items()]
+        for labels, counts, total, count in sorted(series):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                bucket_labels = _format_labels(self.label_names, labels, f'le="{bound}"')
+                lines.append(f'{self.name}_bucket{bucket_labels} {cumulative}')
+            inf_labels = _format_labels(self.label_names, labels, 'le="+Inf"')
+            lines.append(f'{self.name}_bucket{inf_labels} {count}')
+            lines.append(f'{self.name}_sum{_format_labels(self.label_names, labels)} {total}')
+            lines.append(f'{self.name}_count{_format_labels(self.label_names, labels)} {count}')
+        return '\n'.join(lines)
+
+
+REQUEST_LATENCY = Histogram(
+    'registration_http_request_duration_seconds',
+    'Time spent handling HTTP requests, by URL name.',
+    ('endpoint', 'method', 'status')
+)
+
+MONGODB_COMMAND_LATENCY = Histogram(
+    'registration_mongodb_command_duration_seconds',
+    'Round-trip time of MongoDB commands as seen by the driver.',
+    ('command', 'collection', 'outcome')
+)
+
+
+class CommandTimingListener(CommandListener):
+    """Feeds every MongoDB command's duration into MONGODB_COMMAND_LATENCY"""
+
+    def __init__(self):
+        # Collection names are only present on the started event
+        self._collections = {}
+
+    def started(self, event):
+        target = event.command.get(event.command_name)
+        if not isinstance(target, str):
+            target = event.command.get('collection', '')
+        self._collections[(event.connection_id, event.request_id)] = target
+
+    def succeeded(self, event):
+        self._observe(event, 'success')
+
+    def failed(self, event):
+        self._observe(event, 'failure')
+
+    def _observe(self, event, outcome):
+        collection = self._collections.pop((event.connection_id, event.request_id), '')
+        MONGODB_COMMAND_LATENCY.observe(
+            (event.command_name, collection, outcome), event.duration_micros / 1e6
+        )
+
+
+# PoolStatsListener values that go up and down; the rest only grow
+POOL_GAUGES = frozenset({'connections_open', 'checked_out', 'checkout_wait_max_seconds'})
+
+
+def render_metrics(pool_stats=None):
+    """Render every metric, plus connection pool counters when given"""
+    sections = [REQUEST_LATENCY.render(), MONGODB_COMMAND_LATENCY.render()]
+    for name, value in sorted((pool_stats or {}).items()):
+        metric = f'registration_mongodb_pool_{name}'
+        metric_type = 'gauge' if name in POOL_GAUGES else 'counter'
+        sections.append(f'# TYPE {metric} {metric_type}\n{metric} {value}')
+    return '\n'.join(sections) + '\n'
+
+
+class PoolStatsListener(ConnectionPoolListener):
+    """Counts connection pool activity for one MongoClient.
+
+    ``checkout_wait_seconds`` adds up how long requests queued for a
+    connection, which is where an undersized pool shows up first.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {
+            'connections_open': 0,
+            'connections_created': 0,
+            'connections_closed': 0,
+            'checked_out': 0,
+            'checkouts': 0,
+            'checkout_failures': 0,
+            'checkout_wait_seconds': 0.0,
+            'checkout_wait_max_seconds': 0.0,
+            'pool_clears': 0,
+        }
+
+    def snapshot(self):
+        """Return a copy of the current counters"""
+        with self._lock:
+            return dict(self._counters)
+
+    def _add(self, **deltas):
+        with self._lock:
+            for name, delta in deltas.items():
+                self._counters[name] += delta
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._add(pool_clears=1)
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._add(connections_created=1, connections_open=1)
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._add(connections_closed=1, connections_open=-1)
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self._add(checkout_failures=1, checkout_wait_seconds=getattr(event, 'duration', 0.0))
+
+    def connection_checked_out(self, event):
+        wait = getattr(event, 'duration', 0.0)
+        with self._lock:
+            self._counters['checked_out'] += 1
+            self._counters['checkouts'] += 1
+            self._counters['checkout_wait_seconds'] += wait
+            if wait > self._counters['checkout_wait_max_seconds']:
+                self._counters['checkout_wait_max_seconds'] = wait
+
+    def connection_checked_in(self, event):
+        self._add(checked_out=-1)
@@ -0,0 +1,142 @@
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+import hashlib
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+# Seconds each kind of read is served from the cache; 0 turns it off
+READ_CACHE_TTLS = {
+    'registration': int(os.getenv('READ_CACHE_TTL_REGISTRATION', '300')),
+    'registrations': int(os.getenv('READ_CACHE_TTL_REGISTRATIONS', '5')),
+    'stats': int(os.getenv('READ_CACHE_TTL_STATS', '10')),
+}
+
+# Versioned reads (lists, stats) are stored under the current generation;
+# bumping it on every insert orphans them all at once
+GENERATION_KEY = 'registrations:generation'
+
+
+def cache_key(name, *parts):
+    """Cache key for one read, derived from the method and its arguments"""
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()
+    return f'registrations:{name}:{digest}'
+
+
+def _enabled(name):
+    # Outside Django (e.g. mongodbtest.py) there is no cache to use
+    return settings.configured and READ_CACHE_TTLS[name] > 0
+
+
+def _process_local():
+    # Django's async cache methods run the sync ones through sync_to_async,
+    # one hop to the shared sync thread per call. A locmem cache is a dict
+    # behind a lock in this process, so the async helpers call it inline;
+    # file and redis do blocking I/O and keep the hop
+    return isinstance(caches['default'], LocMemCache)
+
+
+def _new_generation():
+    # Time-based, so a generation that was evicted never comes back
+    # with a number old entries are still stored under
+    return time.time_ns()
+
+
+def generation():
+    """Current generation of the versioned reads"""
+    value = cache.get(GENERATION_KEY)
+    if value is None:
+        cache.add(GENERATION_KEY, _new_generation(), None)
+        value = cache.get(GENERATION_KEY)
+    return value
+
+
+def invalidate():
+    """Drop every versioned read after a registration is inserted"""
+    if not settings.configured:
+        return
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.add(GENERATION_KEY, _new_generation(), None)
+    except Exception as e:
+        logger.warning(f"Read cache invalidation failed: {e}")
+
+
+def cached(name, parts, load, versioned=True):
+    """Return ``load()`` through the cache (cache-aside).
+
+    None results are never stored, so a miss is retried next time. If the
+    cache backend fails the read goes straight to ``load``.
+    """
+    if not _enabled(name):
+        return load()
+    key = cache_key(name, *parts)
+    try:
+        version = generation() if versioned else None
+        value = cache.get(key, version=version)
+    except Exception as e:
+        logger.warning(f"Read cache unavailable: {e}")
+        return load()
+    if value is None:
+        value = load()
+        if value is not None:
+            try:
+                cache.set(key, value, READ_CACHE_TTLS[name], version=version)
+            except Exception as e:
+                logger.warning(f"Read cache unavailable: {e}")
+    return value
+
+
+async def ageneration():
+    """Async version of generation"""
+    if _process_local():
+        return generation()
+    value = await cache.aget(GENERATION_KEY)
+    if value is None:
+        await cache.aadd(GENERATION_KEY, _new_generation(), None)
+        value = await cache.aget(GENERATION_KEY)
+    return value
+
+
+async def ainvalidate():
+    """Async version of invalidate"""
+    if not settings.configured:
+        return
+    if _process_local():
+        invalidate()
+        return
+    try:
+        await cache.aincr(GENERATION_KEY)
+    except ValueError:
+        await cache.aadd(GENERATION_KEY, _new_generation(), None)
+    except Exception as e:
+        logger.warning(f"Read cache invalidation failed: {e}")
+
+
+async def acached(name, parts, load, versioned=True):
+    """Async version of cached; ``load`` is a coroutine function"""
+    if not _enabled(name):
+        return await load()
+    key = cache_key(name, *parts)
+    local = _process_local()
+    try:
+        version = await ageneration() if versioned else None
+        value = cache.get(key, version=version) if local else await cache.aget(key, version=version)
+    except Exception as e:
+        logger.warning(f"Read cache unavailable: {e}")
+        return await load()
+    if value is None:
+        value = await load()
+        if value is not None:
+            try:
+                if local:
+                    cache.set(key, value, READ_CACHE_TTLS[name], version=version)
+                else:
+                    await cache.aset(key, value, READ_CACHE_TTLS[name], version=version)
+            except Exception as e:
+                logger.warning(f"Read cache unavailable: {e}")
+    return value
@@ -0,0 +1,54 @@
+from bson import ObjectId
+from django.http import HttpResponse
+from rest_framework.renderers import BaseRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements.txt
+    orjson = None
+    import json
+
+
+def _default(value):
+    """Encode the BSON types orjson does not know about"""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if orjson is None and hasattr(value, 'isoformat'):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(data, indent=False):
+    """Serialize API data, including raw MongoDB documents, to JSON bytes.
+
+    ObjectIds become strings and datetimes ISO 8601 strings, so documents can
+    be rendered straight from the driver without copying them first.
+    """
+    if orjson is not None:
+        option = orjson.OPT_INDENT_2 if indent else 0
+        return orjson.dumps(data, default=_default, option=option)
+    return json.dumps(data, default=_default, indent=2 if indent else None).encode()
+
+
+class MongoJSONRenderer(BaseRenderer):
+    """DRF JSON renderer that understands ObjectId and datetime values"""
+    media_type = 'application/json'
+    format = 'json'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        renderer_context = renderer_context or {}
+        indent = renderer_context.get('indent')
+        if indent is None and accepted_media_type:
+            indent = 'indent=' in accepted_media_type
+        return dumps(data, indent=bool(indent))
+
+
+class MongoJSONResponse(HttpResponse):
+    """JsonResponse counterpart for the async views, backed by dumps()"""
+
+    def __init__(self, data, **kwargs):
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(content=dumps(data), **kwargs)
@@ -0,0 +1,202 @@
+from datetime import datetime
+import fcntl
+import json
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+DATETIME_FIELDS = ('created_at', 'updated_at')
+
+
+def _encode(document):
+    record = dict(document)
+    for field in DATETIME_FIELDS:
+        if field in record:
+            record[field] = record[field].isoformat()
+    return (json.dumps(record) + '\n').encode()
+
+
+def _decode(line):
+    document = json.loads(line)
+    for field in DATETIME_FIELDS:
+        if field in document:
+            document[field] = datetime.fromisoformat(document[field])
+    return document
+
+
+class RegistrationSpool:
+    """Append-only local journal of accepted registrations.
+
+    ``append`` fsyncs each document to ``registrations.jsonl`` before
+    returning, so an accepted registration survives a crash or an Atlas
+    outage. A background thread replays the journal through
+    ``upsert_many`` (which must be idempotent and return {index: write_error}
+    for rejected documents) and records how far it got in
+    ``registrations.offset``. Rejected documents, and lines that cannot be
+    decoded, are moved to ``rejected.jsonl``. Only one process drains at a
+    time; the others just append.
+    """
+
+    def __init__(self, directory, upsert_many, batch_size=500, retry_seconds=5.0):
+        self.directory = directory
+        self.upsert_many = upsert_many
+        self.batch_size = batch_size
+        self.retry_seconds = retry_seconds
+        os.makedirs(directory, exist_ok=True)
+        self.journal_path = os.path.join(directory, 'registrations.jsonl')
+        self.offset_path = os.path.join(directory, 'registrations.offset')
+        self.rejected_path = os.path.join(directory, 'rejected.jsonl')
+        self.lock_path = os.path.join(directory, 'drain.lock')
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+    def append(self, document):
+        """Durably record a registration document for later delivery"""
+        line = _encode(document)
+        fd = os.open(self.journal_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            os.write(fd, line)
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        self._wakeup.set()
+
+    def start(self):
+        """Start the background drain thread for this process"""
+        if self._thread is None:
+            with self._thread_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='registration-spool', daemon=True)
+                    self._thread.start()
+
+    def stop(self):
+        """Stop the drain thread once its current delivery finishes"""
+        with self._thread_lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stopping.set()
+            self._wakeup.set()
+            thread.join()
+            self._stopping.clear()
+
+    def pending_bytes(self):
+        """Size of the journal not yet delivered to MongoDB"""
+        return max(0, self._journal_size() - self._read_offset())
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                delivered = self.drain()
+            except Exception as e:
+                logger.warning(f"Registration spool drain failed, retrying in {self.retry_seconds}s: {e}")
+                delivered = 0
+            if not delivered:
+                self._wakeup.wait(self.retry_seconds)
+                self._wakeup.clear()
+
+    def drain(self):
+        """Deliver pending registrations; returns how many were processed.
+
+        Returns 0 without doing anything if another process is draining.
+        """
+        lock_fd = os.open(self.lock_path, os.O_WRONLY | os.O_CREAT, 0o644)
+        try:
+            try:
+                fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return 0
+
+            processed = 0
+            while True:
+                offset = self._read_offset()
+                if offset > self._journal_size():
+                    # Left behind by a compaction that truncated the journal
+                    # but did not get to reset the offset
+                    logger.warning(f"Registration spool offset {offset} is past the end of the journal, resetting")
+                    offset = 0
+                    self._write_offset(0)
+                lines, consumed = self._read_batch(offset)
+                if not lines:
+                    self._compact(offset)
+                    return processed
+
+                documents, delivered_lines, rejected_lines = [], [], []
+                for line in lines:
+                    try:
+                        documents.append(_decode(line))
+                        delivered_lines.append(line)
+                    except (ValueError, TypeError) as e:
+                        logger.warning(f"Undecodable spooled registration rejected: {e}")
+                        rejected_lines.append(line)
+
+                failures = self.upsert_many(documents) if documents else {}
+                for index, write_error in failures.items():
+                    logger.warning(f"Spooled registration {documents[index]['registration_id']} rejected: "
+                                   f"{write_error.get('errmsg', write_error)}")
+                    rejected_lines.append(delivered_lines[index])
+                if rejected_lines:
+                    with open(self.rejected_path, 'ab') as rejected:
+                        rejected.writelines(rejected_lines)
+                self._write_offset(offset + consumed)
+                processed += len(lines)
+        finally:
+            os.close(lock_fd)
+
+    def _read_batch(self, offset):
+        lines = []
+        consumed = 0
+        try:
+            with open(self.journal_path, 'rb') as journal:
+                journal.seek(offset)
+                for line in journal:
+                    # A line without its newline is still being written
+                    if not line.endswith(b'\n'):
+                        break
+                    lines.append(line)
+                    consumed += len(line)
+                    if len(lines) >= self.batch_size:
+                        break
+        except FileNotFoundError:
+            pass
+        return lines, consumed
+
+    def _compact(self, offset):
+        """Empty the journal once everything in it has been delivered"""
+        if not offset:
+            return
+        fd = os.open(self.journal_path, os.O_WRONLY | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            if os.fstat(fd).st_size == offset:
+                # Offset first: a crash before the truncate only replays
+                # documents that upsert_many already skips
+                self._write_offset(0)
+                os.ftruncate(fd, 0)
+        finally:
+            os.close(fd)
+
+    def _journal_size(self):
+        try:
+            return os.path.getsize(self.journal_path)
+        except FileNotFoundError:
+            return 0
+
+    def _read_offset(self):
+        try:
+            with open(self.offset_path) as offset_file:
+                return int(offset_file.read() or 0)
+        except FileNotFoundError:
+            return 0
+
+    def _write_offset(self, offset):
+        temp_path = self.offset_path + '.tmp'
+        with open(temp_path, 'w') as offset_file:
+            offset_file.write(str(offset))
+            offset_file.flush()
+            os.fsync(offset_file.fileno())
+        os.replace(temp_path, self.offset_path)
@@ -0,0 +1,60 @@
+import threading
+import time
+
+# Group for documents missing the field, e.g. created before email_domain
+# existed and not yet backfilled; stats keys must stay strings
+UNKNOWN_STATS_GROUP = 'unknown'
+
+
+class RegistrationStatsCache:
+    """In-process copy of the /api/stats/ payload.
+
+    The cache is seeded from a full stats query and then bumped in place for
+    every registration this process creates. Other workers' inserts are not
+    seen here, so the snapshot expires after ``ttl`` seconds and is re-seeded
+    from the database.
+    """
+
+    def __init__(self, ttl=30):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._stats = None
+        self._seeded_at = 0.0
+
+    def snapshot(self):
+        """Return a copy of the cached stats, or None if missing or expired"""
+        with self._lock:
+            if self._stats is None or time.monotonic() - self._seeded_at > self.ttl:
+                return None
+            return {
+                'total_registrations': self._stats['total_registrations'],
+                'branch_wise': dict(sorted(self._stats['branch_wise'].items())),
+                'email_domains': dict(sorted(self._stats['email_domains'].items())),
+                'year_wise': dict(sorted(self._stats['year_wise'].items())),
+            }
+
+    def seed(self, stats):
+        """Replace the cached stats with a freshly computed payload"""
+        with self._lock:
+            self._stats = {
+                'total_registrations': stats['total_registrations'],
+                'branch_wise': dict(stats['branch_wise']),
+                'email_domains': dict(stats['email_domains']),
+                'year_wise': dict(stats['year_wise']),
+            }
+            self._seeded_at = time.monotonic()
+
+    def record(self, registration):
+        """Count a newly inserted registration document, as build_stats would"""
+        with self._lock:
+            if self._stats is None:
+                return
+            year = f"Year {registration['year']}"
+            self._stats['total_registrations'] += 1
+            for key, value in (('branch_wise', registration.get('branch')),
+                               ('email_domains', registration.get('email_domain')),
+                               ('year_wise', year)):
+                if value is None:
+                    value = UNKNOWN_STATS_GROUP
+                counts = self._stats[key]
+                counts[value] = counts.get(value, 0) + 1
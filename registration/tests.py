@@ -1,3 +1,1052 @@
-from django.test import TestCase
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+from datetime import datetime
+import json
+import os
+import tempfile
+import types
+import threading
+import time
+from unittest import mock
+from unittest import skipUnless
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import AsyncRequestFactory, SimpleTestCase
+from bson import ObjectId
+from bson.timestamp import Timestamp
+from pymongo import MongoClient
+from pymongo.errors import DuplicateKeyError, ServerSelectionTimeoutError
+from pymongo.read_preferences import Primary, Secondary
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+
+from .batching import AsyncInsertBatcher, InsertBatcher
+from .bloom import BloomFilter, DuplicateFilter
+from .export import csv_rows, ndjson_rows
+from .idempotency import IdempotencyError, abandon_request, begin_request, complete_request
+from .live import RegistrationFeed, registration_delta
+from .monitoring import Histogram
+from . import async_views, mongodb, read_cache
+from .mongodb import (
+    EXPORT_FIELDS,
+    LIST_SORT,
+    MongoDBConnection,
+    STATUS_FIELDS,
+    build_collection_version,
+    build_stats,
+    decode_page_token,
+    duplicate_key_field,
+    encode_page_token,
+    ensure_indexes,
+    get_read_preference,
+    guess_search_field,
+    registration_projection,
+    registrations_query,
+    write_error_field,
+    search_query,
+    search_sort,
+)
+from .mongodb_async import AsyncMongoDBConnection
+from .renderers import MongoJSONRenderer
+from .spool import RegistrationSpool
+from .stats_cache import RegistrationStatsCache
+from .throttling import ConcurrencyLimit, RegisterRateThrottle, take_token
+from .validators import RegistrationValidationError, validate_registration
+from .versioning import CollectionVersion
+from . import views
+from .views import build_page
+
+# Explain-plan checks need a real server; point this at a disposable mongod
+TEST_MONGODB_URI = os.getenv('MONGODB_TEST_CONNECTION_STRING')
+
+
+def plan_stages(plan):
+    """Collect every stage name in an explain() plan tree"""
+    if isinstance(plan, dict):
+        stages = [plan['stage']] if 'stage' in plan else []
+        for value in plan.values():
+            stages.extend(plan_stages(value))
+        return stages
+    if isinstance(plan, list):
+        return [stage for item in plan for stage in plan_stages(item)]
+    return []
+
+
+VALID_SUBMISSION = {
+    'name': ' ishan sharma ',
+    'admission_no': '102203',
+    'email': 'Student@Thapar.edu',
+    'phone': '9876543210',
+    'branch': 'computer engineering',
+    'year': '2',
+}
+
+
+class ValidateRegistrationTests(SimpleTestCase):
+    def test_cleans_valid_submission(self):
+        cleaned = validate_registration(VALID_SUBMISSION)
+        self.assertEqual(cleaned, {
+            'name': 'Ishan Sharma',
+            'admission_no': '102203',
+            'email': 'student@thapar.edu',
+            'phone': '9876543210',
+            'branch': 'COE',
+            'year': 2,
+        })
+
+    def test_missing_field_is_reported_first(self):
+        with self.assertRaises(RegistrationValidationError) as ctx:
+            validate_registration({**VALID_SUBMISSION, 'phone': ''})
+        self.assertEqual(ctx.exception.errors, {'phone': 'phone is required'})
+
+    def test_collects_every_invalid_field(self):
+        with self.assertRaises(RegistrationValidationError) as ctx:
+            validate_registration({**VALID_SUBMISSION, 'admission_no': '12ab', 'email': 'a@yahoo.com'})
+        self.assertEqual(set(ctx.exception.errors), {'admission_no', 'email'})
+
+
+class DuplicateKeyFieldTests(SimpleTestCase):
+    def test_field_is_read_from_key_pattern(self):
+        details = {'code': 11000, 'keyPattern': {'email': 1}, 'errmsg': 'E11000 duplicate key error'}
+        self.assertEqual(write_error_field(details), 'email')
+
+    def test_field_is_read_from_the_index_name_in_the_message(self):
+        message = ('E11000 duplicate key error collection: student_registrations.registrations '
+                   'index: admission_no_1 dup key: { admission_no: "102203" }')
+        self.assertEqual(write_error_field({'errmsg': message}), 'admission_no')
+        self.assertEqual(duplicate_key_field(DuplicateKeyError(message, 11000)), 'admission_no')
+
+    def test_unknown_index_gives_no_field(self):
+        self.assertIsNone(write_error_field({'errmsg': 'E11000 duplicate key error'}))
+
+
+class InsertBatcherTests(SimpleTestCase):
+    def test_concurrent_submissions_share_one_insert(self):
+        flushed = []
+
+        def insert_many(documents):
+            flushed.append(list(documents))
+            # Reject the second document of every batch
+            return {1: {'code': 11000}} if len(documents) > 1 else {}
+
+        batcher = InsertBatcher(insert_many, max_size=10, max_delay=0.05)
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            outcomes = list(pool.map(batcher.submit, [{'n': n} for n in range(4)]))
+
+        self.assertEqual(len(flushed), 1)
+        self.assertEqual(sum(1 for outcome in outcomes if outcome), 1)
+
+
+class AsyncInsertBatcherTests(SimpleTestCase):
+    def run_batcher(self, count, max_size, max_delay=0.01):
+        flushed = []
+
+        async def insert_many(documents):
+            flushed.append([document['n'] for document in documents])
+            # Reject the first document of every batch
+            return {0: {'code': 11000}}
+
+        async def scenario():
+            batcher = AsyncInsertBatcher(insert_many, max_size=max_size, max_delay=max_delay)
+            return await asyncio.gather(*(batcher.submit({'n': n}) for n in range(count)))
+
+        return flushed, asyncio.run(scenario())
+
+    def test_queued_submissions_are_flushed_in_batches_of_max_size(self):
+        flushed, outcomes = self.run_batcher(5, max_size=2)
+        self.assertEqual(flushed, [[0, 1], [2, 3], [4]])
+        self.assertEqual(outcomes, [{'code': 11000}, None, {'code': 11000}, None, {'code': 11000}])
+
+    def test_lone_submission_is_flushed_after_the_delay(self):
+        started = time.monotonic()
+        flushed, outcomes = self.run_batcher(1, max_size=10, max_delay=0.05)
+        self.assertGreaterEqual(time.monotonic() - started, 0.05)
+        self.assertEqual(flushed, [[0]])
+        self.assertEqual(outcomes, [{'code': 11000}])
+
+
+class FakeSession:
+    """Causally consistent session stub recording the times it was advanced to"""
+
+    def __init__(self):
+        self.cluster_time = None
+        self.operation_time = None
+
+    def advance_cluster_time(self, cluster_time):
+        self.cluster_time = cluster_time
+
+    def advance_operation_time(self, operation_time):
+        self.operation_time = operation_time
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+class FakeSessionClient:
+    def start_session(self, causal_consistency=False):
+        return FakeSession()
+
+
+class SessionStubConnection(MongoDBConnection):
+    """Connection with only the state write_session and read_session use"""
+
+    def __init__(self, secondary_reads=True):
+        self.client = FakeSessionClient()
+        self.secondary_reads = secondary_reads
+        self._last_write = None
+        self._last_write_lock = threading.Lock()
+
+    def write_at(self, operation_time):
+        with self.write_session() as session:
+            if session is not None:
+                session.cluster_time = {'clusterTime': operation_time}
+                session.operation_time = operation_time
+
+
+class ReadPreferenceTests(SimpleTestCase):
+    def read_preference(self, **environ):
+        with mock.patch.dict(os.environ, environ):
+            return get_read_preference()
+
+    def test_default_is_primary(self):
+        with mock.patch.dict(os.environ):
+            os.environ.pop('MONGODB_READ_PREFERENCE', None)
+            self.assertEqual(get_read_preference(), Primary())
+
+    def test_secondary_reads_honour_max_staleness(self):
+        read_preference = self.read_preference(
+            MONGODB_READ_PREFERENCE='secondary', MONGODB_MAX_STALENESS_SECONDS='120'
+        )
+        self.assertEqual(read_preference, Secondary(max_staleness=120))
+
+    def test_invalid_settings_are_rejected(self):
+        for environ in ({'MONGODB_READ_PREFERENCE': 'secondaries'},
+                        {'MONGODB_READ_PREFERENCE': 'SECONDARY'},
+                        {'MONGODB_READ_PREFERENCE': 'nearest', 'MONGODB_MAX_STALENESS_SECONDS': '30'}):
+            with self.subTest(environ=environ), self.assertRaises(Exception):
+                self.read_preference(**environ)
+
+
+class ReadSessionTests(SimpleTestCase):
+    def test_primary_reads_use_no_session(self):
+        connection = SessionStubConnection(secondary_reads=False)
+        connection.write_at(Timestamp(100, 1))
+        with connection.read_session() as session:
+            self.assertIsNone(session)
+        self.assertIsNone(connection._last_write)
+
+    def test_no_session_before_the_first_write(self):
+        with SessionStubConnection().read_session() as session:
+            self.assertIsNone(session)
+
+    def test_reads_wait_for_the_latest_write(self):
+        connection = SessionStubConnection()
+        connection.write_at(Timestamp(100, 2))
+        connection.write_at(Timestamp(100, 1))
+        with connection.read_session() as session:
+            self.assertEqual(session.operation_time, Timestamp(100, 2))
+            self.assertEqual(session.cluster_time, {'clusterTime': Timestamp(100, 2)})
+
+    def test_async_reads_wait_for_the_latest_write(self):
+        connection = AsyncMongoDBConnection.__new__(AsyncMongoDBConnection)
+        connection.client = FakeSessionClient()
+        connection.secondary_reads = True
+        connection._last_write = None
+
+        async def scenario():
+            async with connection.read_session() as before:
+                self.assertIsNone(before)
+            async with connection.write_session() as session:
+                session.cluster_time = {'clusterTime': Timestamp(100, 1)}
+                session.operation_time = Timestamp(100, 1)
+            async with connection.read_session() as session:
+                return session.operation_time
+
+        self.assertEqual(asyncio.run(scenario()), Timestamp(100, 1))
+
+
+class StubInsertConnection(MongoDBConnection):
+    """Connection whose insert_documents rejects the second document as a duplicate"""
+
+    def __init__(self):
+        self.stats_cache = RegistrationStatsCache()
+        self.version = CollectionVersion()
+        self.inserted = []
+
+    def insert_documents(self, documents):
+        self.inserted.append([document['admission_no'] for document in documents])
+        return {1: {'index': 1, 'code': 11000, 'keyPattern': {'email': 1},
+                    'errmsg': 'E11000 duplicate key error'}}
+
+
+class BulkCreateRegistrationsTests(SimpleTestCase):
+    def test_report_maps_each_row_to_its_outcome(self):
+        rows = [
+            VALID_SUBMISSION,
+            {**VALID_SUBMISSION, 'admission_no': '102204'},
+            {**VALID_SUBMISSION, 'email': 'not-an-email'},
+            {**VALID_SUBMISSION, 'admission_no': '102205', 'email': 'other@thapar.edu'},
+        ]
+        connection = StubInsertConnection()
+        with mock.patch.object(mongodb, 'get_duplicate_filter', return_value=DuplicateFilter(100)), \
+                self.assertLogs('registration.mongodb', 'INFO'):
+            report = connection.bulk_create_registrations(rows)
+
+        self.assertEqual(connection.inserted, [['102203', '102204', '102205']])
+        self.assertEqual([entry['status'] for entry in report], ['created', 'duplicate', 'invalid', 'created'])
+        self.assertEqual([entry['row'] for entry in report], [0, 1, 2, 3])
+        self.assertEqual(report[1]['field'], 'email')
+        self.assertIn('email', report[2]['errors'])
+
+
+class HistogramTests(SimpleTestCase):
+    def test_renders_cumulative_buckets(self):
+        histogram = Histogram('request_seconds', 'Request time.', ('endpoint',), buckets=(0.1, 1.0))
+        histogram.observe(('stats',), 0.05)
+        histogram.observe(('stats',), 0.5)
+        histogram.observe(('stats',), 5)
+
+        lines = histogram.render().splitlines()
+        self.assertIn('request_seconds_bucket{endpoint="stats",le="0.1"} 1', lines)
+        self.assertIn('request_seconds_bucket{endpoint="stats",le="1.0"} 2', lines)
+        self.assertIn('request_seconds_bucket{endpoint="stats",le="+Inf"} 3', lines)
+        self.assertIn('request_seconds_count{endpoint="stats"} 3', lines)
+
+
+class RegistrationsQueryTests(SimpleTestCase):
+    def test_branch_filter_is_exact_upper_case_match(self):
+        query = registrations_query(branch=' coe ')
+        self.assertEqual(query, {'is_active': True, 'branch': 'COE'})
+
+    def test_branch_filter_does_not_build_a_regex(self):
+        query = registrations_query(branch='.*')
+        self.assertEqual(query['branch'], '.*')
+
+    def test_search_term_is_an_escaped_anchored_prefix(self):
+        query = search_query('email', 'ishan.s')
+        self.assertEqual(query['email'], {'$regex': r'^ishan\.s'})
+
+    def test_search_requires_an_admin(self):
+        request = APIRequestFactory().get('/api/registrations/search/', {'q': 'a'})
+        with mock.patch.object(views, 'get_mongodb') as get_mongodb:
+            response = views.search_registrations(request)
+        self.assertEqual(response.status_code, 403)
+        get_mongodb.assert_not_called()
+
+        request = AsyncRequestFactory().get('/api/registrations/search/', {'q': 'a'})
+        with mock.patch.object(async_views, 'get_async_mongodb') as get_async_mongodb:
+            response = asyncio.run(async_views.search_registrations(request))
+        self.assertEqual(response.status_code, 403)
+        get_async_mongodb.assert_not_called()
+
+    def test_search_field_is_guessed_from_the_term(self):
+        self.assertEqual(
+            [guess_search_field(term) for term in ('2201', 'ishan@', 'Ishan')],
+            ['admission_no', 'email', 'name']
+        )
+
+
+class BuildStatsTests(SimpleTestCase):
+    def test_missing_group_values_are_counted_as_unknown(self):
+        stats = build_stats({
+            'total': [{'count': 4}],
+            'branch_wise': [{'_id': 'COMPUTER ENGINEERING', 'count': 4}],
+            'email_domains': [{'_id': None, 'count': 3}, {'_id': 'thapar.edu', 'count': 1}],
+            'year_wise': [{'_id': 2, 'count': 4}],
+        })
+        self.assertEqual(stats['email_domains'], {'unknown': 3, 'thapar.edu': 1})
+        self.assertEqual(sorted(stats['email_domains']), ['thapar.edu', 'unknown'])
+
+    def test_empty_collection_has_no_groups(self):
+        stats = build_stats({'total': [], 'branch_wise': [], 'email_domains': [], 'year_wise': []})
+        self.assertEqual(stats['total_registrations'], 0)
+        self.assertEqual(stats['email_domains'], {})
+
+
+class RegistrationStatsCacheTests(SimpleTestCase):
+    STATS = {
+        'total_registrations': 2,
+        'branch_wise': {'COE': 2},
+        'email_domains': {'thapar.edu': 2},
+        'year_wise': {'Year 2': 2},
+    }
+
+    def test_recorded_registrations_are_added_to_the_seeded_counts(self):
+        stats_cache = RegistrationStatsCache(ttl=60)
+        stats_cache.seed(self.STATS)
+        stats_cache.record({'branch': 'ECE', 'email_domain': 'thapar.edu', 'year': 2})
+        stats_cache.record({'branch': 'COE', 'year': 3})
+        self.assertEqual(stats_cache.snapshot(), {
+            'total_registrations': 4,
+            'branch_wise': {'COE': 3, 'ECE': 1},
+            'email_domains': {'thapar.edu': 3, 'unknown': 1},
+            'year_wise': {'Year 2': 3, 'Year 3': 1},
+        })
+        self.assertEqual(self.STATS['total_registrations'], 2)
+
+    def test_record_before_seed_is_ignored(self):
+        stats_cache = RegistrationStatsCache(ttl=60)
+        stats_cache.record({'branch': 'COE', 'email_domain': 'thapar.edu', 'year': 2})
+        self.assertIsNone(stats_cache.snapshot())
+        stats_cache.seed(self.STATS)
+        self.assertEqual(stats_cache.snapshot(), self.STATS)
+
+    def test_snapshot_expires_after_the_ttl(self):
+        stats_cache = RegistrationStatsCache(ttl=30)
+        with mock.patch('registration.stats_cache.time.monotonic', return_value=1000.0):
+            stats_cache.seed(self.STATS)
+        with mock.patch('registration.stats_cache.time.monotonic', return_value=1030.0):
+            self.assertEqual(stats_cache.snapshot(), self.STATS)
+        with mock.patch('registration.stats_cache.time.monotonic', return_value=1030.5):
+            self.assertIsNone(stats_cache.snapshot())
+
+
+class PageTokenTests(SimpleTestCase):
+    def test_token_round_trips_the_cursor_position(self):
+        registration = {'created_at': datetime(2025, 7, 1, 9, 30, 15, 123000), '_id': ObjectId()}
+        token = encode_page_token(registration)
+        self.assertEqual(decode_page_token(token), (registration['created_at'], registration['_id']))
+
+    def test_invalid_tokens_raise_value_error(self):
+        for token in ('not-a-token', 'WyJ4Il0=', encode_page_token({'created_at': datetime(2025, 1, 1), '_id': 'x'})):
+            with self.subTest(token=token), self.assertRaises(ValueError):
+                decode_page_token(token)
+
+
+class RenderingTests(SimpleTestCase):
+    def test_renders_object_ids_and_datetimes(self):
+        object_id = ObjectId()
+        body = MongoJSONRenderer().render({'_id': object_id, 'created_at': datetime(2025, 8, 1, 9, 30)})
+        self.assertEqual(json.loads(body), {'_id': str(object_id), 'created_at': '2025-08-01T09:30:00'})
+
+    def test_page_drops_cursor_fields_that_were_not_selected(self):
+        registrations = [{'_id': ObjectId(), 'created_at': datetime(2025, 8, 1), 'name': 'Ishan Sharma'}]
+        page = build_page(registrations, limit=1, fields=['name'])
+        self.assertEqual(page['registrations'], [{'name': 'Ishan Sharma'}])
+        self.assertIsNotNone(page['next_cursor'])
+
+
+class ExportTests(SimpleTestCase):
+    REGISTRATION = {
+        'registration_id': ObjectId('64b7f0c2a1b2c3d4e5f60718'),
+        'name': 'Sharma, "Ishan"',
+        'admission_no': '102203',
+        'branch': 'COE',
+        'year': 2,
+        'created_at': datetime(2025, 8, 1, 9, 30),
+    }
+
+    def export(self, export_format, registrations):
+        request = APIRequestFactory().get('/api/registrations/export/', {'format': export_format})
+        connection = mock.Mock(**{'iter_registrations.return_value': registrations})
+        with mock.patch.object(views, 'is_admin', return_value=True), \
+                mock.patch.object(views, 'get_mongodb', return_value=connection):
+            return views.export_registrations(request)
+
+    def test_ndjson_rows_serialise_object_ids_and_datetimes(self):
+        rows = list(ndjson_rows([self.REGISTRATION]))
+        self.assertEqual(len(rows), 1)
+        row = json.loads(rows[0])
+        self.assertEqual(list(row), mongodb.EXPORT_FIELDS)
+        self.assertEqual(row['registration_id'], '64b7f0c2a1b2c3d4e5f60718')
+        self.assertEqual(row['created_at'], '2025-08-01T09:30:00')
+        self.assertIsNone(row['email'])
+
+    def test_csv_rows_start_with_a_header_and_quote_values(self):
+        rows = list(csv_rows([self.REGISTRATION]))
+        self.assertEqual(rows[0], ','.join(mongodb.EXPORT_FIELDS) + '\r\n')
+        self.assertEqual(
+            rows[1],
+            '64b7f0c2a1b2c3d4e5f60718,"Sharma, ""Ishan""",102203,,,COE,2,2025-08-01T09:30:00,\r\n'
+        )
+
+    def test_unknown_format_is_rejected(self):
+        response = self.export('xml', [])
+        self.assertEqual(response.status_code, 400)
+
+    def test_failed_query_is_reported_before_streaming(self):
+        def failing_cursor():
+            raise ServerSelectionTimeoutError('No servers available')
+            yield
+
+        with self.assertLogs('registration.views', 'ERROR'):
+            response = self.export('csv', failing_cursor())
+        self.assertEqual(response.status_code, 500)
+
+    def test_streams_every_registration(self):
+        response = self.export('ndjson', [self.REGISTRATION, {**self.REGISTRATION, 'admission_no': '102204'}])
+        self.assertEqual(response.status_code, 200)
+        rows = b''.join(response.streaming_content).splitlines()
+        self.assertEqual([json.loads(row)['admission_no'] for row in rows], ['102203', '102204'])
+
+
+class CollectionVersionTests(SimpleTestCase):
+    def test_new_registration_changes_the_version(self):
+        newest = {'_id': ObjectId(), 'created_at': datetime(2025, 8, 1)}
+        before = build_collection_version(1, newest)
+        after = build_collection_version(2, {'_id': ObjectId(), 'created_at': datetime(2025, 8, 1)})
+        self.assertNotEqual(before['etag'], after['etag'])
+        self.assertEqual(before['last_modified'], newest['created_at'])
+
+    def test_invalidate_drops_the_cached_version(self):
+        version = CollectionVersion(ttl=60)
+        version.seed({'etag': '1-0', 'last_modified': None}, version.generation())
+        version.invalidate()
+        self.assertIsNone(version.snapshot())
+
+    def test_version_read_before_a_write_is_not_cached(self):
+        version = CollectionVersion(ttl=60)
+        generation = version.generation()
+        # A write lands while the reader is still querying
+        version.invalidate()
+        version.seed({'etag': '1-0', 'last_modified': None}, generation)
+        self.assertIsNone(version.snapshot())
+        version.seed({'etag': '2-0', 'last_modified': None}, version.generation())
+        self.assertEqual(version.snapshot()['etag'], '2-0')
+
+
+class BloomFilterTests(SimpleTestCase):
+    def test_added_keys_are_always_found(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        keys = [f'admission_no:{number:06d}' for number in range(1000)]
+        for key in keys:
+            bloom.add(key)
+        self.assertTrue(all(key in bloom for key in keys))
+
+    def test_false_positive_rate_stays_near_target(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        for number in range(1000):
+            bloom.add(f'email:{number}@gmail.com')
+        false_positives = sum(f'email:{number}@yahoo.com' in bloom for number in range(10000))
+        self.assertLess(false_positives, 300)
+
+    def test_duplicate_filter_reports_each_taken_field(self):
+        duplicates = DuplicateFilter(capacity=100)
+        duplicates.add({'admission_no': '220101', 'email': 'ishan@gmail.com'})
+        taken = duplicates.maybe_taken({'admission_no': '220101', 'email': 'other@gmail.com'})
+        self.assertEqual(taken, ['admission_no'])
+
+    def test_duplicate_filter_warms_from_an_async_scan(self):
+        async def scan(field):
+            for value in {'admission_no': ['220101'], 'email': ['ishan@gmail.com']}.get(field, []):
+                yield value
+
+        async def scenario():
+            duplicates = DuplicateFilter(capacity=100)
+            duplicates.astart(scan)
+            await duplicates._task
+            return duplicates
+
+        duplicates = asyncio.run(scenario())
+        taken = duplicates.maybe_taken({'admission_no': '220101', 'email': 'ishan@gmail.com'})
+        self.assertEqual(taken, ['admission_no', 'email'])
+
+    def test_caller_warm_up_does_not_open_a_sync_client(self):
+        warmed = []
+        with mock.patch.object(mongodb, '_duplicate_filter', None), \
+                mock.patch.object(mongodb, '_duplicate_filter_pid', None), \
+                mock.patch.object(mongodb, 'get_mongodb') as get_mongodb:
+            duplicates = mongodb.get_duplicate_filter(warmed.append)
+            self.assertIs(mongodb.get_duplicate_filter(warmed.append), duplicates)
+        self.assertEqual(warmed, [duplicates])
+        get_mongodb.assert_not_called()
+
+
+class ThrottlingTests(SimpleTestCase):
+    def test_bucket_allows_a_burst_then_asks_to_wait(self):
+        waits = [take_token('throttle-test:burst', capacity=3, duration=60) for _ in range(4)]
+        self.assertEqual(waits[:3], [0, 0, 0])
+        self.assertAlmostEqual(waits[3], 20, delta=1)
+
+    def test_requests_over_the_cap_are_shed(self):
+        limit = ConcurrencyLimit(1, retry_after=2)
+        # The outer call holds the only slot while the inner one arrives
+        inner = limit(lambda request: 'ok')
+        outer = limit(lambda request: inner(request))
+        response = outer(None)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '2')
+        self.assertEqual(limit.in_flight, 0)
+
+    def test_no_limit_leaves_the_view_unwrapped(self):
+        view = lambda request: 'ok'
+        self.assertIs(ConcurrencyLimit(None)(view), view)
+
+    def test_client_ip_is_not_read_from_x_forwarded_for_by_default(self):
+        cache.clear()
+        factory = APIRequestFactory()
+
+        def post(n):
+            submission = {**VALID_SUBMISSION, 'admission_no': f'1022{n:02d}'}
+            request = factory.post('/api/register/', submission, format='json',
+                                   headers={'X-Forwarded-For': f'203.0.113.{n}'})
+            return views.create_registration(request).status_code
+
+        with mock.patch.object(RegisterRateThrottle, 'THROTTLE_RATES', {'register_ip': '3/min'}), \
+                mock.patch.object(views, '_create_registration',
+                                  return_value=Response({'registration_id': 'abc'}, status=201)):
+            statuses = [post(n) for n in range(6)]
+        self.assertEqual(statuses, [201, 201, 201, 429, 429, 429])
+
+
+    def test_per_ip_limit_is_off_by_default(self):
+        self.assertIsNone(RegisterRateThrottle().rate)
+
+    def test_async_429_matches_the_sync_views(self):
+        cache.clear()
+        rates = {'register_ip': None, 'register_admission_no': '1/min'}
+
+        def post_sync():
+            request = APIRequestFactory().post('/api/register/', VALID_SUBMISSION, format='json')
+            return views.create_registration(request)
+
+        def post_async():
+            request = AsyncRequestFactory().post('/api/register/', json.dumps(VALID_SUBMISSION),
+                                                 content_type='application/json')
+            return asyncio.run(async_views.create_registration(request))
+
+        with mock.patch('rest_framework.throttling.SimpleRateThrottle.THROTTLE_RATES', rates), \
+                mock.patch.object(views, '_create_registration',
+                                  return_value=Response({'registration_id': 'abc'}, status=201)):
+            post_sync()
+            sync_response = post_sync()
+        cache.clear()
+        with mock.patch('rest_framework.throttling.SimpleRateThrottle.THROTTLE_RATES', rates), \
+                mock.patch.object(async_views, '_create_registration',
+                                  mock.AsyncMock(return_value=({'registration_id': 'abc'}, 201))):
+            post_async()
+            async_response = post_async()
+
+        self.assertEqual((sync_response.status_code, async_response.status_code), (429, 429))
+        self.assertEqual(json.loads(async_response.content), sync_response.data)
+        self.assertEqual(async_response['Retry-After'], sync_response['Retry-After'])
+
+
+class CreateRegistrationTests(SimpleTestCase):
+    def test_created_body_leaves_out_internal_fields(self):
+        stored = {**mongodb.build_registration_document(validate_registration(VALID_SUBMISSION)), '_id': ObjectId()}
+        connection = mock.Mock(create_registration=mock.Mock(return_value=stored))
+        with mock.patch.object(views, 'get_mongodb', return_value=connection):
+            response = views._create_registration(validate_registration(VALID_SUBMISSION))
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(list(response.data['data']), EXPORT_FIELDS)
+
+
+class IdempotencyTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.data = validate_registration(VALID_SUBMISSION)
+
+    def test_completed_request_is_replayed(self):
+        self.assertIsNone(begin_request('key-1', self.data))
+        complete_request('key-1', self.data, 201, {'registration_id': 'abc'})
+        self.assertEqual(begin_request('key-1', self.data), (201, {'registration_id': 'abc'}))
+
+    def test_key_reused_with_a_different_body_is_rejected(self):
+        begin_request('key-1', self.data)
+        complete_request('key-1', self.data, 201, {'registration_id': 'abc'})
+        with self.assertRaises(IdempotencyError) as caught:
+            begin_request('key-1', {**self.data, 'phone': '9123456780'})
+        self.assertEqual(caught.exception.status, 422)
+
+    def test_key_in_flight_is_a_conflict(self):
+        begin_request('key-1', self.data)
+        with self.assertRaises(IdempotencyError) as caught:
+            begin_request('key-1', self.data)
+        self.assertEqual(caught.exception.status, 409)
+
+    def test_abandoned_key_can_be_used_again(self):
+        begin_request('key-1', self.data)
+        abandon_request('key-1')
+        self.assertIsNone(begin_request('key-1', self.data))
+
+    def test_failed_registration_releases_its_key(self):
+        factory = APIRequestFactory()
+
+        def post():
+            request = factory.post('/api/register/', VALID_SUBMISSION, format='json',
+                                   headers={'Idempotency-Key': 'key-1'})
+            return views.create_registration(request)
+
+        with mock.patch.object(views, '_create_registration',
+                               return_value=Response({'error': 'Internal server error'}, status=500)):
+            self.assertEqual(post().status_code, 500)
+        with mock.patch.object(views, '_create_registration',
+                               return_value=Response({'registration_id': 'abc'}, status=201)):
+            self.assertEqual(post().status_code, 201)
+        response = post()
+        self.assertEqual((response.status_code, response['Idempotent-Replayed']), (201, 'true'))
+
+
+class ReadCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.loads = []
+
+    def load(self, value):
+        self.loads.append(value)
+        return value
+
+    def test_versioned_reads_reload_after_invalidation(self):
+        first = read_cache.cached('stats', ('test',), lambda: self.load({'total_registrations': 1}))
+        cached = read_cache.cached('stats', ('test',), lambda: self.load({'total_registrations': 2}))
+        read_cache.invalidate()
+        fresh = read_cache.cached('stats', ('test',), lambda: self.load({'total_registrations': 2}))
+        self.assertEqual([first, cached, fresh], [{'total_registrations': 1}] * 2 + [{'total_registrations': 2}])
+        self.assertEqual(len(self.loads), 2)
+
+    def test_missing_results_are_not_cached(self):
+        read_cache.cached('registration', ('missing',), lambda: self.load(None), versioned=False)
+        read_cache.cached('registration', ('missing',), lambda: self.load(None), versioned=False)
+        self.assertEqual(self.loads, [None, None])
+
+    def test_async_reads_call_a_locmem_cache_inline(self):
+        async def load():
+            return self.load({'total_registrations': len(self.loads) + 1})
+
+        async def scenario():
+            first = await read_cache.acached('stats', ('async',), load)
+            cached = await read_cache.acached('stats', ('async',), load)
+            await read_cache.ainvalidate()
+            fresh = await read_cache.acached('stats', ('async',), load)
+            return [first, cached, fresh]
+
+        with mock.patch('django.core.cache.backends.base.sync_to_async', side_effect=AssertionError):
+            results = asyncio.run(scenario())
+        self.assertEqual([result['total_registrations'] for result in results], [1, 1, 2])
+
+
+class IdleCollection:
+    """Collection stub whose change stream never produces an event"""
+
+    async def watch(self, *args, **kwargs):
+        await asyncio.Event().wait()
+
+
+class RegistrationFeedTests(SimpleTestCase):
+    def test_delta_counts_missing_groups_as_unknown(self):
+        delta = registration_delta({'registration_id': 'abc', 'name': 'Ishan Sharma', 'year': 2})
+        self.assertEqual(delta, {
+            'total_registrations': 1,
+            'branch_wise': {'unknown': 1},
+            'email_domains': {'unknown': 1},
+            'year_wise': {'Year 2': 1},
+        })
+
+    def test_slow_subscriber_is_cut_off_without_blocking_others(self):
+        async def scenario():
+            feed = RegistrationFeed(IdleCollection(), queue_size=1)
+            slow, fast = feed.subscribe(), feed.subscribe()
+            feed.publish(b'first')
+            await fast.get()
+            feed.publish(b'second')
+            received = (await slow.get(), await fast.get())
+            feed.unsubscribe(fast)
+            return received, feed._task
+
+        received, task = asyncio.run(scenario())
+        self.assertEqual(received, (None, b'second'))
+        self.assertIsNone(task)
+
+    def test_fresh_stats_are_pushed_to_subscribers(self):
+        async def load_stats():
+            return {'total_registrations': 3}
+
+        async def scenario():
+            feed = RegistrationFeed(IdleCollection(), load_stats=load_stats, resync_seconds=0.01)
+            queue = feed.subscribe()
+            message = await asyncio.wait_for(queue.get(), 1)
+            snapshot = await feed.stats_snapshot()
+            feed.unsubscribe(queue)
+            return message, snapshot
+
+        message, snapshot = asyncio.run(scenario())
+        self.assertEqual(message, b'event: stats\ndata: {"total_registrations":3}\n\n')
+        self.assertEqual(snapshot, message)
+
+    def test_connections_share_one_stats_snapshot(self):
+        loads = []
+
+        async def load_stats():
+            loads.append(None)
+            await asyncio.sleep(0)
+            return {'total_registrations': len(loads)}
+
+        async def scenario():
+            feed = RegistrationFeed(IdleCollection(), load_stats=load_stats, resync_seconds=60)
+            queues = [feed.subscribe() for _ in range(3)]
+            snapshots = await asyncio.gather(*(feed.stats_snapshot() for _ in queues))
+            for queue in queues:
+                feed.unsubscribe(queue)
+            return snapshots
+
+        snapshots = asyncio.run(scenario())
+        self.assertEqual(len(loads), 1)
+        self.assertEqual(set(snapshots), {b'event: stats\ndata: {"total_registrations":1}\n\n'})
+
+
+def matches(document, query):
+    return all(document.get(key) == value for key, value in query.items())
+
+
+class AsyncStubCursor:
+    def __init__(self, documents):
+        self.documents = documents
+
+    def sort(self, keys):
+        for key, direction in reversed(keys):
+            self.documents.sort(key=lambda document: document[key], reverse=direction < 0)
+        return self
+
+    def limit(self, limit):
+        self.documents = self.documents[:limit]
+        return self
+
+    async def to_list(self):
+        return self.documents
+
+
+class AsyncStubCollection:
+    """In-memory stand-in for the AsyncCollection calls made by the async views.
+
+    Queries are plain equality filters; admission_no and email are unique.
+    """
+
+    def __init__(self):
+        self.documents = []
+
+    async def insert_one(self, document, session=None):
+        for field in ('admission_no', 'email'):
+            if any(stored[field] == document[field] for stored in self.documents):
+                raise DuplicateKeyError('E11000 duplicate key error', 11000, {'keyPattern': {field: 1}})
+        document['_id'] = ObjectId()
+        self.documents.append(dict(document))
+        return types.SimpleNamespace(inserted_id=document['_id'])
+
+    def find(self, query, projection=None, session=None):
+        return AsyncStubCursor([dict(document) for document in self.documents if matches(document, query)])
+
+    async def find_one(self, query, projection=None, sort=None, session=None):
+        cursor = self.find(query)
+        if sort:
+            cursor.sort(sort)
+        return next(iter(cursor.documents), None)
+
+    async def estimated_document_count(self):
+        return len(self.documents)
+
+
+class AsyncViewsTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = AsyncRequestFactory()
+        with mock.patch.dict(os.environ, {'MONGODB_CONNECTION_STRING': 'mongodb://127.0.0.1:9/'}):
+            self.connection = AsyncMongoDBConnection()
+        self.connection.collection = self.connection.read_collection = AsyncStubCollection()
+        for patcher in (
+            mock.patch.object(async_views, 'get_async_mongodb', return_value=self.connection),
+            mock.patch('registration.mongodb_async.get_duplicate_filter', return_value=DuplicateFilter(100)),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def register(self, submission):
+        request = self.factory.post('/api/register/', json.dumps(submission), content_type='application/json')
+        return asyncio.run(async_views.create_registration(request))
+
+    def list_registrations(self, headers=None):
+        request = self.factory.get('/api/registrations/', headers=headers)
+        return asyncio.run(async_views.list_registrations(request))
+
+    def test_registration_is_created(self):
+        response = self.register(VALID_SUBMISSION)
+        self.assertEqual(response.status_code, 201)
+        data = json.loads(response.content)['data']
+        self.assertEqual((data['name'], data['admission_no']), ('Ishan Sharma', '102203'))
+        self.assertEqual(list(data), EXPORT_FIELDS)
+        self.assertEqual(len(self.connection.collection.documents), 1)
+
+    def test_duplicate_registration_reports_the_clashing_field(self):
+        self.register(VALID_SUBMISSION)
+        with self.assertLogs('registration.mongodb_async', 'WARNING'):
+            response = self.register({**VALID_SUBMISSION, 'admission_no': '102204'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(json.loads(response.content)['field'], 'email')
+
+    def test_list_returns_registrations_then_not_modified(self):
+        self.register(VALID_SUBMISSION)
+        self.register({**VALID_SUBMISSION, 'admission_no': '102204', 'email': 'other@thapar.edu'})
+
+        response = self.list_registrations()
+        self.assertEqual(response.status_code, 200)
+        page = json.loads(response.content)
+        self.assertEqual([registration['admission_no'] for registration in page['registrations']],
+                         ['102204', '102203'])
+
+        response = self.list_registrations({'If-None-Match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+
+class RecordingUpsert:
+    """upsert_many stub that records each batch and fails as told"""
+
+    def __init__(self, failures=None, errors=0):
+        self.batches = []
+        self.failures = failures or {}
+        self.errors = errors
+        self.delivered = threading.Event()
+
+    def __call__(self, documents):
+        if self.errors:
+            self.errors -= 1
+            raise ConnectionError('Atlas unavailable')
+        self.batches.append([document['registration_id'] for document in documents])
+        self.delivered.set()
+        return self.failures
+
+
+class RegistrationSpoolTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def spool(self, upsert, batch_size=500):
+        return RegistrationSpool(self.directory, upsert, batch_size=batch_size)
+
+    def append(self, spool, *registration_ids):
+        for registration_id in registration_ids:
+            spool.append({'registration_id': registration_id, 'created_at': datetime(2025, 1, 1)})
+
+    def test_appended_registrations_are_delivered_in_batches(self):
+        upsert = RecordingUpsert()
+        spool = self.spool(upsert, batch_size=2)
+        self.append(spool, 'a', 'b', 'c')
+        self.assertGreater(spool.pending_bytes(), 0)
+        self.assertEqual(spool.drain(), 3)
+        self.assertEqual(upsert.batches, [['a', 'b'], ['c']])
+        self.assertEqual(spool.drain(), 0)
+
+    def test_delivered_journal_is_compacted(self):
+        spool = self.spool(RecordingUpsert())
+        self.append(spool, 'a')
+        spool.drain()
+        self.assertEqual(os.path.getsize(spool.journal_path), 0)
+        self.assertEqual(spool._read_offset(), 0)
+        self.assertEqual(spool.pending_bytes(), 0)
+
+    def test_failed_delivery_is_retried(self):
+        upsert = RecordingUpsert(errors=1)
+        spool = self.spool(upsert)
+        self.append(spool, 'a')
+        with self.assertRaises(ConnectionError):
+            spool.drain()
+        self.assertEqual(spool._read_offset(), 0)
+        self.assertEqual(spool.drain(), 1)
+        self.assertEqual(upsert.batches, [['a']])
+
+    def test_rejected_and_undecodable_lines_are_moved_aside(self):
+        spool = self.spool(RecordingUpsert(failures={1: {'errmsg': 'E11000 duplicate key error'}}))
+        self.append(spool, 'a')
+        with open(spool.journal_path, 'ab') as journal:
+            journal.write(b'{"registration_id": \n')
+        self.append(spool, 'b')
+        with self.assertLogs('registration.spool', 'WARNING'):
+            self.assertEqual(spool.drain(), 3)
+        with open(spool.rejected_path, 'rb') as rejected:
+            lines = rejected.read().splitlines()
+        self.assertEqual(lines[0], b'{"registration_id": ')
+        self.assertEqual(json.loads(lines[1])['registration_id'], 'b')
+
+    def test_likely_duplicate_check_does_not_wait_for_an_unreachable_cluster(self):
+        environ = {'MONGODB_CONNECTION_STRING': 'mongodb://127.0.0.1:9/',
+                   'MONGODB_SERVER_SELECTION_TIMEOUT_MS': '3000'}
+        with mock.patch.dict(os.environ, environ):
+            connection = MongoDBConnection()
+        self.addCleanup(connection.client.close)
+        duplicates = DuplicateFilter(100)
+        duplicates.add(validate_registration(VALID_SUBMISSION))
+        spool = self.spool(RecordingUpsert())
+
+        with mock.patch.object(mongodb, 'WRITE_MODE', 'spooled'), \
+                mock.patch.object(mongodb, 'get_duplicate_filter', return_value=duplicates), \
+                mock.patch.object(mongodb, 'get_spool', return_value=spool), \
+                self.assertLogs('registration.mongodb', 'WARNING'):
+            started = time.monotonic()
+            connection.create_registration(validate_registration(VALID_SUBMISSION))
+        self.assertLess(time.monotonic() - started, 1.5)
+        self.assertGreater(spool.pending_bytes(), 0)
+
+    def test_reopened_journal_is_drained_on_start(self):
+        # Accepted by a process that died before delivering them
+        self.append(self.spool(RecordingUpsert()), 'a', 'b')
+
+        upsert = RecordingUpsert()
+        spool = self.spool(upsert)
+        spool.start()
+        self.addCleanup(spool.stop)
+        self.assertTrue(upsert.delivered.wait(5))
+        self.assertEqual(upsert.batches, [['a', 'b']])
+
+    def test_offset_past_the_end_of_the_journal_is_reset(self):
+        upsert = RecordingUpsert()
+        spool = self.spool(upsert)
+        spool._write_offset(10000)
+        self.append(spool, 'a')
+        with self.assertLogs('registration.spool', 'WARNING'):
+            self.assertEqual(spool.drain(), 1)
+        self.assertEqual(upsert.batches, [['a']])
+
+
+@skipUnless(TEST_MONGODB_URI, "MONGODB_TEST_CONNECTION_STRING is not set")
+class RegistrationsQueryPlanTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.client = MongoClient(TEST_MONGODB_URI, serverSelectionTimeoutMS=5000)
+        cls.collection = cls.client['iste_registration_test']['registrations']
+        cls.collection.drop()
+        ensure_indexes(cls.collection)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.client.drop_database('iste_registration_test')
+        cls.client.close()
+        super().tearDownClass()
+
+    def explain_stages(self, query):
+        plan = self.collection.find(query).sort(LIST_SORT).limit(50).explain()
+        return plan_stages(plan['queryPlanner']['winningPlan'])
+
+    def test_branch_list_uses_index_without_sort(self):
+        stages = self.explain_stages(registrations_query(branch='coe'))
+        self.assertIn('IXSCAN', stages)
+        self.assertNotIn('SORT', stages)
+
+    def test_unfiltered_list_uses_index_without_sort(self):
+        stages = self.explain_stages(registrations_query())
+        self.assertIn('IXSCAN', stages)
+        self.assertNotIn('SORT', stages)
+
+    def test_status_lookup_is_a_covered_index_seek(self):
+        query = {'registration_id': 'c0ffee00-0000-4000-8000-000000000000', 'is_active': True}
+        plan = self.collection.find(query, registration_projection(STATUS_FIELDS)).explain()
+        stages = plan_stages(plan['queryPlanner']['winningPlan'])
+        self.assertIn('IXSCAN', stages)
+        self.assertNotIn('COLLSCAN', stages)
+        self.assertNotIn('FETCH', stages)
+
+    def test_prefix_search_uses_index_without_sort(self):
+        for field, term in (('admission_no', '22'), ('email', 'ish'), ('name', 'ish')):
+            plan = self.collection.find(search_query(field, term)).sort(search_sort(field)).limit(20).explain()
+            stages = plan_stages(plan['queryPlanner']['winningPlan'])
+            self.assertIn('IXSCAN', stages)
+            self.assertNotIn('SORT', stages)
@@ -0,0 +1,168 @@
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.http import JsonResponse
+from rest_framework.exceptions import Throttled
+from rest_framework.throttling import SimpleRateThrottle
+from functools import wraps
+import os
+import threading
+import time
+
+SHED_RETRY_AFTER = int(os.getenv('REGISTER_SHED_RETRY_AFTER', '1'))
+
+
+def _refill(state, capacity, duration, now):
+    """Spend one token from a bucket; returns (new state, seconds to wait)"""
+    tokens, stamp = state if state else (capacity, now)
+    rate = capacity / duration
+    tokens = min(capacity, tokens + (now - stamp) * rate)
+    if tokens >= 1:
+        return (tokens - 1, now), 0
+    return (tokens, now), (1 - tokens) / rate
+
+
+def take_token(key, capacity, duration):
+    """Take a token from the bucket at ``key``; returns 0 or the seconds to wait.
+
+    Buckets hold up to ``capacity`` tokens and refill at capacity/duration
+    per second. The read and write are not atomic, so concurrent requests on
+    one key may occasionally both get through.
+    """
+    state, wait = _refill(cache.get(key), capacity, duration, time.time())
+    cache.set(key, state, duration)
+    return wait
+
+
+async def atake_token(key, capacity, duration):
+    """Async version of take_token"""
+    state, wait = _refill(await cache.aget(key), capacity, duration, time.time())
+    await cache.aset(key, state, duration)
+    return wait
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """DRF throttle backed by a token bucket in the default cache.
+
+    Rates use the usual DRF format ("20/min") under DEFAULT_THROTTLE_RATES;
+    the count is both the burst size and the refill per period.
+    """
+
+    def get_cache_key(self, request, view):
+        return self.key_for(request, request.data)
+
+    def key_for(self, request, data):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        key = self.get_cache_key(request, view)
+        if key is None:
+            return True
+        self._wait = take_token(key, self.num_requests, self.duration)
+        return self._wait == 0
+
+    async def await_time(self, request, data):
+        """Seconds the client must wait, or 0; for views outside DRF"""
+        key = self.key_for(request, data) if self.rate else None
+        if key is None:
+            return 0
+        return await atake_token(key, self.num_requests, self.duration)
+
+    def wait(self):
+        return self._wait
+
+
+class RegisterRateThrottle(TokenBucketThrottle):
+    """Limits registration attempts per client IP"""
+    scope = 'register_ip'
+
+    def key_for(self, request, data):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+class AdmissionNumberRateThrottle(TokenBucketThrottle):
+    """Limits registration attempts per admission number, whatever the IP"""
+    scope = 'register_admission_no'
+
+    def key_for(self, request, data):
+        admission_no = data.get('admission_no') if hasattr(data, 'get') else None
+        if not isinstance(admission_no, str) or not admission_no.strip():
+            return None
+        return self.cache_format % {'scope': self.scope, 'ident': admission_no.upper().strip()}
+
+
+REGISTER_THROTTLES = (RegisterRateThrottle, AdmissionNumberRateThrottle)
+
+
+async def athrottle_registration(request, data):
+    """Async views' equivalent of DRF's throttle check; returns seconds to wait or 0"""
+    waits = [await throttle().await_time(request, data) for throttle in REGISTER_THROTTLES]
+    return max(waits)
+
+
+def throttled_response(wait):
+    """429 response in the shape DRF gives the sync views, telling the client when to retry"""
+    throttled = Throttled(wait)
+    response = JsonResponse({'detail': throttled.detail}, status=throttled.status_code)
+    response['Retry-After'] = str(throttled.wait)
+    return response
+
+
+class ConcurrencyLimit:
+    """View decorator capping the requests a worker runs at once.
+
+    Requests over the cap get an immediate 503 with Retry-After instead of
+    queueing behind the ones in flight. Works for sync and async views;
+    with no ``limit`` the view is returned unwrapped.
+    """
+
+    def __init__(self, limit, retry_after=SHED_RETRY_AFTER):
+        self.limit = limit
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    def _enter(self):
+        with self._lock:
+            if self.in_flight >= self.limit:
+                return False
+            self.in_flight += 1
+            return True
+
+    def _exit(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def _shed(self):
+        response = JsonResponse({'error': 'Server busy, please retry shortly'}, status=503)
+        response['Retry-After'] = str(self.retry_after)
+        return response
+
+    def __call__(self, view):
+        if self.limit is None:
+            return view
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def limited(request, *args, **kwargs):
+                if not self._enter():
+                    return self._shed()
+                try:
+                    return await view(request, *args, **kwargs)
+                finally:
+                    self._exit()
+        else:
+            @wraps(view)
+            def limited(request, *args, **kwargs):
+                if not self._enter():
+                    return self._shed()
+                try:
+                    return view(request, *args, **kwargs)
+                finally:
+                    self._exit()
+        return limited
+
+
+# Shared by the sync and async registration views
+register_concurrency = ConcurrencyLimit(settings.REGISTER_MAX_IN_FLIGHT)
@@ -1,9 +1,25 @@
+from django.conf import settings
 from django.urls import path, include
 from . import views
 
+# Under ASGI the API endpoints are served by the async views
+api = views
+if settings.REGISTRATION_ASYNC_VIEWS:
+    from . import async_views
+    api = async_views
+
 urlpatterns = [
     path('', views.index, name='index'),
-    path('api/register/', views.create_registration, name='create_registration'),
-    path('api/registrations/', views.list_registrations, name='list_registrations'),
-    path('api/stats/', views.registration_stats, name='registration_stats'),
-]
\ No newline at end of file
+    path('api/register/', api.create_registration, name='create_registration'),
+    path('api/register/bulk/', views.bulk_create_registrations, name='bulk_create_registrations'),
+    path('api/registrations/', api.list_registrations, name='list_registrations'),
+    path('api/registrations/export/', api.export_registrations, name='export_registrations'),
+    path('api/registrations/search/', api.search_registrations, name='search_registrations'),
+    path('api/registrations/<uuid:registration_id>/', api.get_registration, name='get_registration'),
+    path('api/stats/', api.registration_stats, name='registration_stats'),
+    path('api/pool-stats/', api.pool_stats, name='pool_stats'),
+]
+
+# The live feed holds its connection open, so it is only served under ASGI
+if settings.REGISTRATION_ASYNC_VIEWS:
+    urlpatterns.append(path('api/feed/', async_views.registration_feed, name='registration_feed'))
\ No newline at end of file
@@ -0,0 +1,122 @@
+from types import MappingProxyType
+import re
+
+# Same rules as RegistrationSerializer, without its database lookups: the
+# unique indexes on admission_no/email are what reject duplicates.
+NAME_PATTERN = re.compile(r'[a-zA-Z\s]+')
+ADMISSION_NO_PATTERN = re.compile(r'\d{6}')
+PHONE_PATTERN = re.compile(r'\d{10}')
+
+REQUIRED_FIELDS = ('name', 'admission_no', 'email', 'phone', 'branch', 'year')
+
+ALLOWED_EMAIL_DOMAINS = frozenset({'gmail.com', 'thapar.edu'})
+
+INVALID_PHONES = frozenset({'0000000000', '1111111111'})
+
+COMMON_BRANCHES = MappingProxyType({
+    'COE': 'COE', 'COMPUTER': 'COE', 'COMPUTER ENGINEERING': 'COE',
+    'ECE': 'ECE', 'ELECTRONICS': 'ECE', 'ELECTRONICS AND COMMUNICATION': 'ECE',
+    'EEE': 'EEE', 'ELECTRICAL': 'EEE', 'ELECTRICAL AND ELECTRONICS': 'EEE',
+    'MECH': 'MECH', 'MECHANICAL': 'MECH', 'MECHANICAL ENGINEERING': 'MECH',
+    'CIVIL': 'CIVIL', 'CIVIL ENGINEERING': 'CIVIL',
+    'IT': 'IT', 'INFORMATION TECHNOLOGY': 'IT',
+    'CSE': 'CSE', 'COMPUTER SCIENCE': 'CSE',
+    'CHEMICAL': 'CHEMICAL', 'CHEMICAL ENGINEERING': 'CHEMICAL',
+    'BIOTECHNOLOGY': 'BIOTECHNOLOGY', 'BIOTECH': 'BIOTECHNOLOGY',
+    'AEROSPACE': 'AEROSPACE', 'AERONAUTICAL': 'AEROSPACE'
+})
+
+_ALLOWED_DOMAINS_TEXT = ', '.join(sorted(ALLOWED_EMAIL_DOMAINS))
+
+
+class RegistrationValidationError(ValueError):
+    """Raised with a {field: message} dict when a submission is rejected"""
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__(next(iter(errors.values())))
+
+
+def _clean_name(value):
+    name = value.strip()
+    if not NAME_PATTERN.fullmatch(name):
+        return None, "Name can only contain letters and spaces."
+    if len(name) < 2:
+        return None, "Name must be at least 2 characters long."
+    return name.title(), None
+
+
+def _clean_admission_no(value):
+    admission_no = value.strip()
+    if not ADMISSION_NO_PATTERN.fullmatch(admission_no):
+        return None, "Admission number must be exactly 6 digits."
+    return admission_no, None
+
+
+def _clean_email(value):
+    email = value.strip().lower()
+    local, at, domain = email.rpartition('@')
+    if not at or not local:
+        return None, "Please enter a valid email address."
+    if domain not in ALLOWED_EMAIL_DOMAINS:
+        return None, f"Email must be from one of these domains: {_ALLOWED_DOMAINS_TEXT}"
+    return email, None
+
+
+def _clean_phone(value):
+    phone = value.strip()
+    if not PHONE_PATTERN.fullmatch(phone):
+        return None, "Phone number must be exactly 10 digits."
+    if phone in INVALID_PHONES:
+        return None, "Please enter a valid phone number."
+    return phone, None
+
+
+def _clean_branch(value):
+    branch = value.strip().upper()
+    branch = COMMON_BRANCHES.get(branch, branch)
+    if len(branch) < 2:
+        return None, "Branch name is too short."
+    return branch, None
+
+
+def _clean_year(value):
+    try:
+        return int(value), None
+    except (TypeError, ValueError):
+        return None, "Year must be a whole number."
+
+
+_CLEANERS = (
+    ('name', _clean_name),
+    ('admission_no', _clean_admission_no),
+    ('email', _clean_email),
+    ('phone', _clean_phone),
+    ('branch', _clean_branch),
+    ('year', _clean_year),
+)
+
+
+def validate_registration(data):
+    """Return a cleaned copy of a submission or raise RegistrationValidationError"""
+    if not hasattr(data, 'get'):
+        raise RegistrationValidationError({'non_field_errors': 'Expected an object of registration fields'})
+
+    for field in REQUIRED_FIELDS:
+        if not data.get(field):
+            raise RegistrationValidationError({field: f'{field} is required'})
+
+    cleaned = {}
+    errors = {}
+    for field, clean in _CLEANERS:
+        value = data[field]
+        if field != 'year' and not isinstance(value, str):
+            errors[field] = f'{field} must be a string'
+            continue
+        cleaned[field], error = clean(value)
+        if error:
+            errors[field] = error
+
+    if errors:
+        raise RegistrationValidationError(errors)
+    return cleaned
@@ -0,0 +1,48 @@
+import threading
+import time
+
+
+class CollectionVersion:
+    """In-process copy of the registrations collection's version.
+
+    The version is a cheap validator (document count plus the newest
+    registration) used to answer conditional GETs without running the list
+    query. Writes made by this process invalidate it straight away; other
+    workers' writes are picked up once it is older than ``ttl`` seconds.
+
+    Readers take ``generation()`` before querying and pass it to ``seed()``,
+    so a version read before a concurrent write is not cached after it.
+    """
+
+    def __init__(self, ttl=2):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._version = None
+        self._seeded_at = 0.0
+        self._generation = 0
+
+    def snapshot(self):
+        """Return the cached version, or None if missing or expired"""
+        with self._lock:
+            if self._version is None or time.monotonic() - self._seeded_at > self.ttl:
+                return None
+            return self._version
+
+    def generation(self):
+        """Return the number of invalidations so far; pass it back to seed()"""
+        with self._lock:
+            return self._generation
+
+    def seed(self, version, generation):
+        """Cache a version just read, unless invalidate() ran since ``generation`` was taken"""
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._version = version
+            self._seeded_at = time.monotonic()
+
+    def invalidate(self):
+        """Forget the cached version after this process wrote to the collection"""
+        with self._lock:
+            self._version = None
+            self._generation += 1
@@ -1,60 +1,193 @@
 from rest_framework import status
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
+from rest_framework.permissions import IsAdminUser
+from rest_framework.request import Request
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from django.conf import settings
 from django.shortcuts import render
-from django.http import JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
 from django.views.decorators.csrf import csrf_exempt
-from .mongodb import mongodb
+from .export import EXPORT_FORMATS, prefetch
+from .monitoring import render_metrics
+from .throttling import REGISTER_THROTTLES, register_concurrency
+from .idempotency import (
+    IDEMPOTENCY_HEADER,
+    IdempotencyError,
+    abandon_request,
+    begin_request,
+    complete_request,
+)
+from .validators import RegistrationValidationError, validate_registration
+from .mongodb import (
+    get_mongodb,
+    DuplicateRegistrationError,
+    CURSOR_FIELDS,
+    LIST_FIELDS,
+    MAX_PAGE_SIZE,
+    MAX_SEARCH_TERM_LENGTH,
+    SEARCH_KEYS,
+    SEARCH_MAX_PAGE_SIZE,
+    STATUS_FIELDS,
+    WRITE_MODE,
+    decode_page_token,
+    decode_search_token,
+    encode_page_token,
+    encode_search_token,
+    guess_search_field,
+    normalise_search_term,
+    public_registration,
+)
+import calendar
+import hashlib
 import logging
 import json
 
 logger = logging.getLogger(__name__)
 
+def parse_limit(params, default):
+    """Read a positive page size from a query string"""
+    try:
+        limit = int(params.get('limit', default))
+    except ValueError:
+        limit = 0
+    if limit < 1:
+        raise ValueError("limit must be a positive integer")
+    return limit
+
+
+def parse_list_params(params):
+    """Read the branch filter, page size, continuation cursor and field selection from a query string"""
+    limit = parse_limit(params, 100)
+
+    cursor = params.get('cursor')
+    after = decode_page_token(cursor) if cursor else None
+
+    fields = [field.strip() for field in params.get('fields', '').split(',') if field.strip()]
+    unknown = sorted(set(fields) - LIST_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return params.get('branch'), min(limit, MAX_PAGE_SIZE), after, fields or None
+
+
+def build_page(registrations, limit, fields=None):
+    """Build a page of registrations along with the cursor for the next one.
+
+    Documents are returned as read from MongoDB; the renderer takes care of
+    ObjectId and datetime values. Cursor keys read only to build the token
+    are dropped again unless the client selected them.
+    """
+    next_cursor = None
+    if registrations and len(registrations) == limit:
+        next_cursor = encode_page_token(registrations[-1])
+    if fields:
+        unselected = [key for key in CURSOR_FIELDS if key not in fields]
+        for registration in registrations:
+            for key in unselected:
+                registration.pop(key, None)
+    return {'registrations': registrations, 'count': len(registrations), 'next_cursor': next_cursor}
+
+
+def parse_search_params(params):
+    """Read the search field, normalised term, page size and cursor from a query string"""
+    term = params.get('q', '')
+    if not term.strip():
+        raise ValueError("q is required")
+    if len(term) > MAX_SEARCH_TERM_LENGTH:
+        raise ValueError(f"q must be at most {MAX_SEARCH_TERM_LENGTH} characters")
+
+    field = params.get('field') or guess_search_field(term)
+    if field not in SEARCH_KEYS:
+        raise ValueError(f"field must be one of: {', '.join(SEARCH_KEYS)}")
+
+    limit = min(parse_limit(params, 20), SEARCH_MAX_PAGE_SIZE)
+    cursor = params.get('cursor')
+    after = decode_search_token(cursor, field) if cursor else None
+    return field, normalise_search_term(field, term), limit, after
+
+
+def build_search_page(registrations, limit, field):
+    """Build a page of search results along with the cursor for the next one"""
+    next_cursor = None
+    if registrations and len(registrations) == limit:
+        next_cursor = encode_search_token(field, registrations[-1])
+    for registration in registrations:
+        registration.pop('name_lower', None)
+    return {'field': field, 'registrations': registrations, 'count': len(registrations), 'next_cursor': next_cursor}
+
+
+def content_etag(data):
+    """Validator for a response payload, derived from its content"""
+    digest = hashlib.md5(json.dumps(data, sort_keys=True, default=str).encode(), usedforsecurity=False)
+    return f'W/"{digest.hexdigest()}"'
+
+
+def version_validators(version):
+    """ETag and Last-Modified timestamp for a collection version"""
+    last_modified = version['last_modified']
+    if last_modified is not None:
+        # MongoDB returns naive datetimes in UTC
+        last_modified = calendar.timegm(last_modified.utctimetuple())
+    return f'W/"{version["etag"]}"', last_modified
+
+
+def set_cache_headers(response, etag, last_modified=None):
+    """Attach validators and let clients and proxies reuse the response briefly"""
+    response.headers['ETag'] = etag
+    if last_modified is not None:
+        response.headers['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, public=True, max_age=settings.API_CACHE_MAX_AGE, must_revalidate=True)
+    patch_vary_headers(response, ('Accept',))
+    return response
+
+
+def not_modified(request, etag, last_modified=None):
+    """Return a 304 response if the client's copy is still current, else None"""
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        set_cache_headers(response, etag, last_modified)
+    return response
+
+
+def is_admin(request):
+    """Apply DRF's authentication and IsAdminUser to a plain Django request.
+
+    For views that stream, which DRF's content negotiation gets in the way of.
+    """
+    authenticators = [authenticator() for authenticator in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+    return IsAdminUser().has_permission(Request(request, authenticators=authenticators), None)
+
+
 def index(request):
     """Render the registration form HTML page"""
     return render(request, 'index.html')
 
-@api_view(['POST'])
-def create_registration(request):
-    """API endpoint to create a new registration"""
+def _create_registration(data):
+    """Insert validated registration data and build the API response"""
     try:
-        data = request.data
-        
-        # Validate required fields
-        required_fields = ['name', 'admission_no', 'email', 'phone', 'branch', 'year']
-        for field in required_fields:
-            if not data.get(field):
-                return Response(
-                    {'error': f'{field} is required'}, 
-                    status=status.HTTP_400_BAD_REQUEST
-                )
+        # Create registration; the unique indexes on admission_no/email
+        # reject duplicates, so no existence pre-check is needed
+        registration = get_mongodb().create_registration(data)
         
-        # Check if registration already exists
-        if mongodb.registration_exists(
-            admission_no=data['admission_no'],
-            email=data['email']
-        ):
+        if WRITE_MODE == 'spooled':
             return Response(
-                {'error': 'Student already registered with this admission number or email'}, 
-                status=status.HTTP_400_BAD_REQUEST
+                {'message': 'Registration received!', 'registration_id': registration['registration_id']}, 
+                status=status.HTTP_202_ACCEPTED
             )
         
-        # Create registration
-        registration = mongodb.create_registration(data)
-        
-        # Convert ObjectId to string for JSON serialization
-        if '_id' in registration:
-            registration['_id'] = str(registration['_id'])
-        if 'created_at' in registration:
-            registration['created_at'] = registration['created_at'].isoformat()
-        if 'updated_at' in registration:
-            registration['updated_at'] = registration['updated_at'].isoformat()
-        
         return Response(
-            {'message': 'Registration successful!', 'data': registration}, 
+            {'message': 'Registration successful!', 'data': public_registration(registration)}, 
             status=status.HTTP_201_CREATED
         )
         
+    except DuplicateRegistrationError as e:
+        return Response(
+            {'error': str(e), 'field': e.field}, 
+            status=status.HTTP_400_BAD_REQUEST
+        )
     except ValueError as e:
         return Response(
             {'error': str(e)}, 
@@ -67,28 +200,106 @@ def create_registration(request):
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
+@register_concurrency
+@api_view(['POST'])
+@throttle_classes(REGISTER_THROTTLES)
+def create_registration(request):
+    """API endpoint to create a new registration.
+
+    A request carrying an Idempotency-Key header is processed once; retries
+    with the same key get the original response back without a database call.
+    Attempts are rate limited per IP and per admission number, and requests
+    beyond the worker's concurrency cap are shed with a 503.
+    """
+    try:
+        data = validate_registration(request.data)
+    except RegistrationValidationError as e:
+        return Response(
+            {'error': str(e), 'errors': e.errors}, 
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    key = request.headers.get(IDEMPOTENCY_HEADER)
+    if not key:
+        return _create_registration(data)
+
+    try:
+        replay = begin_request(key, data)
+    except IdempotencyError as e:
+        return Response({'error': str(e)}, status=e.status)
+    if replay:
+        replay_status, body = replay
+        return Response(body, status=replay_status, headers={'Idempotent-Replayed': 'true'})
+
+    response = _create_registration(data)
+    if response.status_code < 300:
+        complete_request(key, data, response.status_code, response.data)
+    else:
+        abandon_request(key)
+    return response
+
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def bulk_create_registrations(request):
+    """Admin API endpoint to import a JSON list of registrations in one request"""
+    rows = request.data
+    if isinstance(rows, dict):
+        rows = rows.get('registrations')
+    if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+        return Response(
+            {'error': 'Expected a list of registrations'}, 
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        report = get_mongodb().bulk_create_registrations(rows)
+        summary = {
+            result: sum(1 for entry in report if entry['status'] == result)
+            for result in ('created', 'duplicate', 'invalid')
+        }
+        return Response(
+            {'summary': summary, 'results': report}, 
+            status=status.HTTP_200_OK
+        )
+
+    except Exception as e:
+        logger.error(f"Bulk registration error: {e}")
+        return Response(
+            {'error': 'Internal server error'}, 
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
 @api_view(['GET'])
 def list_registrations(request):
-    """API endpoint to list registrations"""
+    """API endpoint to list registrations, one keyset-paginated page at a time.
+
+    Answers If-None-Match/If-Modified-Since with 304 from the cached
+    collection version, without running the list query.
+    """
     try:
-        branch = request.GET.get('branch')
-        limit = int(request.GET.get('limit', 100))
-        
-        registrations = mongodb.get_registrations(branch=branch, limit=limit)
-        
-        # Convert ObjectIds and dates to strings
-        for registration in registrations:
-            if '_id' in registration:
-                registration['_id'] = str(registration['_id'])
-            if 'created_at' in registration:
-                registration['created_at'] = registration['created_at'].isoformat()
-            if 'updated_at' in registration:
-                registration['updated_at'] = registration['updated_at'].isoformat()
-        
+        branch, limit, after, fields = parse_list_params(request.GET)
+    except ValueError as e:
         return Response(
-            {'registrations': registrations, 'count': len(registrations)}, 
+            {'error': str(e)}, 
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        mongodb = get_mongodb()
+        etag, last_modified = version_validators(mongodb.get_collection_version())
+        response = not_modified(request, etag, last_modified)
+        if response is not None:
+            return response
+
+        registrations = mongodb.get_registrations(
+            branch=branch, limit=limit, after=after, fields=fields
+        )
+        
+        response = Response(
+            build_page(registrations, limit, fields), 
             status=status.HTTP_200_OK
         )
+        return set_cache_headers(response, etag, last_modified)
         
     except Exception as e:
         logger.error(f"Error fetching registrations: {e}")
@@ -97,12 +308,102 @@ def list_registrations(request):
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def search_registrations(request):
+    """Admin API endpoint for prefix search on admission number, email or name.
+
+    ``?q=`` is matched against ``?field=`` (admission_no, email or name);
+    without ``field`` it is guessed from the term. Results come in index
+    order, one capped page at a time. They include contact details, so the
+    endpoint is admin-only like the export.
+    """
+    try:
+        field, term, limit, after = parse_search_params(request.GET)
+    except ValueError as e:
+        return Response(
+            {'error': str(e)}, 
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        registrations = get_mongodb().search_registrations(field, term, limit=limit, after=after)
+        return Response(
+            build_search_page(registrations, limit, field), 
+            status=status.HTTP_200_OK
+        )
+
+    except Exception as e:
+        logger.error(f"Error searching registrations: {e}")
+        return Response(
+            {'error': 'Internal server error'}, 
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+@api_view(['GET'])
+def get_registration(request, registration_id):
+    """API endpoint for a student to check one registration by its registration_id"""
+    try:
+        registration = get_mongodb().get_registration_by_id(str(registration_id), fields=STATUS_FIELDS)
+    except Exception as e:
+        logger.error(f"Error fetching registration: {e}")
+        return Response(
+            {'error': 'Internal server error'}, 
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+    if registration is None:
+        return Response(
+            {'error': 'Registration not found'}, 
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    etag = content_etag(registration)
+    response = not_modified(request, etag)
+    if response is None:
+        response = Response(registration, status=status.HTTP_200_OK)
+    return set_cache_headers(response, etag)
+
+@require_GET
+def export_registrations(request):
+    """Admin endpoint streaming every registration as NDJSON (default) or CSV"""
+    if not is_admin(request):
+        return JsonResponse(
+            {'error': 'Admin access required'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    export_format = request.GET.get('format', 'ndjson')
+    if export_format not in EXPORT_FORMATS:
+        return JsonResponse(
+            {'error': f"format must be one of: {', '.join(EXPORT_FORMATS)}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    render_rows, content_type = EXPORT_FORMATS[export_format]
+    try:
+        registrations = prefetch(get_mongodb().iter_registrations(branch=request.GET.get('branch')))
+    except Exception as e:
+        logger.error(f"Error exporting registrations: {e}")
+        return JsonResponse(
+            {'error': 'Internal server error'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+    response = StreamingHttpResponse(render_rows(registrations), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="registrations.{export_format}"'
+    return response
+
 @api_view(['GET'])
 def registration_stats(request):
-    """API endpoint to get registration statistics"""
+    """API endpoint to get registration statistics, with an ETag for conditional GETs"""
     try:
-        stats = mongodb.get_registration_stats()
-        return Response(stats, status=status.HTTP_200_OK)
+        stats = get_mongodb().get_registration_stats()
+        etag = content_etag(stats)
+        response = not_modified(request, etag)
+        if response is None:
+            response = Response(stats, status=status.HTTP_200_OK)
+        return set_cache_headers(response, etag)
         
     except Exception as e:
         logger.error(f"Error fetching stats: {e}")
@@ -111,6 +412,28 @@ def registration_stats(request):
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def pool_stats(request):
+    """Admin API endpoint exposing this worker's MongoDB connection pool counters"""
+    try:
+        return Response(get_mongodb().pool_stats.snapshot(), status=status.HTTP_200_OK)
+    except Exception as e:
+        logger.error(f"Error fetching pool stats: {e}")
+        return Response(
+            {'error': 'Internal server error'}, 
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+@require_GET
+def metrics(request):
+    """Prometheus endpoint with this worker's request and MongoDB timings"""
+    try:
+        pool_stats = get_mongodb().pool_stats.snapshot()
+    except Exception:
+        pool_stats = None
+    return HttpResponse(render_metrics(pool_stats), content_type='text/plain; version=0.0.4')
+
 def registration_form(request):
     """Render the registration form"""
     return render(request, 'index.html')
\ No newline at end of file